@@ -1,509 +1,2892 @@
+import argparse
+import copy
+import csv
 import curses
+import gzip
+import heapq
+import json
+import os
+import struct
+import tempfile
+import threading
 import random
 import time
 import math
+import bisect
+import operator
+from array import array
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+import sys
+
+try:
+    import fcntl
+except ImportError:  # No advisory file locks here; score updates are unlocked
+    fcntl = None
+
+try:
+    import numpy as np
+except ImportError:  # Parallax layers fall back to the array module
+    np = None
+import unicodedata
 
 HIGH_SCORES_FILE = "high_scores.txt"
+SCORE_HISTORY_FILE = "score_history.txt"  # Every finished game, appended in order
+HIGH_SCORE_SLOTS = 10
+
+# High scores shared by every game session on this host. The top-10 file is
+# cached in memory and only re-read when another session has replaced it;
+# updates take an exclusive lock, merge what is on disk, and replace the
+# file atomically so a crash or a concurrent finish never leaves it torn.
+# Every game is also appended to a history file, indexed here by level.
+class ScoreStore:
+    def __init__(self, path=HIGH_SCORES_FILE, history_path=SCORE_HISTORY_FILE, slots=HIGH_SCORE_SLOTS):
+        self.path = path
+        self.history_path = history_path
+        self.lock_path = path + ".lock"
+        self.slots = slots
+        self._heap = []  # Min-heap of (score, -order, name, level), lowest score first
+        self._order = 0  # Insertion counter; among equal scores the oldest ranks first
+        self._signature = None  # (inode, size, mtime) of the top-10 file when cached
+        self.history = []  # (score, name, level, timestamp) for every game read so far
+        self.by_level = {}  # Level -> history entries that ended on that level
+        self._history_read = 0  # Bytes of the history file already parsed
+
+    # Hold an exclusive lock shared with other game processes
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _file_signature(self):
+        try:
+            info = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return info.st_ino, info.st_size, info.st_mtime_ns
+
+    # Re-read the top-10 file if it changed since we cached it
+    def _refresh(self):
+        signature = self._file_signature()
+        if signature == self._signature:
+            return
+        self._signature = signature
+        self._heap = []
+        self._order = 0
+        try:
+            with open(self.path, "r") as file:
+                for line in file:
+                    parts = line.strip().split(" ", 2)
+                    if len(parts) == 3:
+                        score, name, level = parts
+                        try:
+                            self._push(int(score), name, int(level))
+                        except ValueError:
+                            continue
+        except FileNotFoundError:
+            pass
+
+    # Put an entry into the bounded heap; returns False if it did not make the cut
+    def _push(self, score, name, level):
+        self._order += 1
+        entry = (score, -self._order, name, level)
+        if len(self._heap) < self.slots:
+            heapq.heappush(self._heap, entry)
+            return True
+        return heapq.heappushpop(self._heap, entry) is not entry
+
+    # Read history lines appended since the last call, by us or anyone else
+    def _read_new_history(self):
+        try:
+            with open(self.history_path, "rb") as file:
+                file.seek(self._history_read)
+                data = file.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b"\n") + 1  # Leave a partly written last line for next time
+        self._history_read += end
+        for line in data[:end].decode("utf-8", "replace").splitlines():
+            parts = line.split(" ", 3)
+            if len(parts) != 4:
+                continue
+            timestamp, score, level, name = parts
+            try:
+                entry = (int(score), name, int(level), float(timestamp))
+            except ValueError:
+                continue
+            self.history.append(entry)
+            self.by_level.setdefault(entry[2], []).append(entry)
+
+    # Top scores, best first, as (score, name, level)
+    def top(self):
+        self._refresh()
+        return self._ranked()
+
+    # True if the score would make the top 10
+    def qualifies(self, score):
+        self._refresh()
+        return len(self._heap) < self.slots or score > self._heap[0][0]
+
+    # Record a finished game; returns True if it made the top 10
+    def add(self, score, name, level):
+        name = "_".join(name.split())  # The file format is space-separated
+        with self._locked():
+            self._append_history(score, name, level)
+            self._signature = None  # Merge whatever other sessions wrote
+            self._refresh()
+            placed = self._push(score, name, level)
+            if placed:
+                self._write_top()
+        self._read_new_history()
+        return placed
+
+    # Record a finished game in the history only, leaving the top 10 alone
+    def record_history(self, score, name, level):
+        name = "_".join(name.split())
+        with self._locked():
+            self._append_history(score, name, level)
+        self._read_new_history()
+
+    # Append to the history in one write so concurrent lines never interleave
+    def _append_history(self, score, name, level):
+        line = f"{time.time():.3f} {score} {level} {name}\n".encode("utf-8")
+        fd = os.open(self.history_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    # Replace the top-10 list wholesale
+    def replace(self, high_scores):
+        with self._locked():
+            self._heap = []
+            self._order = 0
+            for score, name, level in high_scores:
+                self._push(score, name, level)
+            self._write_top()
+
+    # Entries ever recorded for a level, oldest first
+    def history_for_level(self, level):
+        self._read_new_history()
+        return list(self.by_level.get(level, ()))
+
+    # Write the cached top 10 to a temp file and rename it over the old one
+    def _write_top(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=".high_scores.", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as file:
+                for score, name, level in self._ranked():
+                    file.write(f"{score} {name} {level}\n")
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(temp_path, 0o644)  # mkstemp creates the file private to us
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._signature = self._file_signature()
+
+    # The cached entries, best first, without checking the file for changes
+    def _ranked(self):
+        return [(score, name, level) for score, _, name, level in sorted(self._heap, reverse=True)]
+
+score_store = ScoreStore()
 
 # Function to load high scores from a file
 def load_high_scores():
-    try:
-        with open(HIGH_SCORES_FILE, "r") as file:
-            high_scores = []
-            for line in file.readlines():
-                parts = line.strip().split(" ", 2)
-                if len(parts) == 3:
-                    score, name, level = parts
-                    try:
-                        high_scores.append((int(score), name, int(level)))
-                    except ValueError:
-                        continue
-            return high_scores
-    except FileNotFoundError:
-        return []
+    return score_store.top()
 
 # Function to save high scores to a file
 def save_high_scores(high_scores):
-    with open(HIGH_SCORES_FILE, "w") as file:
-        for score, name, level in high_scores:
-            file.write(f"{score} {name} {level}\n")
+    score_store.replace(high_scores)
 
 # Function to update the high score list with a new score
 def update_high_scores(new_score, name, level):
-    high_scores = load_high_scores()
-    if len(high_scores) < 10 or new_score > high_scores[-1][0]:
-        high_scores.append((new_score, name, level))
-        high_scores = sorted(high_scores, key=lambda x: x[0], reverse=True)[:10]
-        save_high_scores(high_scores)
+    score_store.add(new_score, name, level)
+
+# Full-screen banners: lines of art placed relative to the centre of the
+# screen, as (rows down, columns right, text). Rows with an empty text are
+# room for text filled in when the banner is shown.
+def banner_art(top, left, lines):
+    return [(top + i, left, line) for i, line in enumerate(lines)]
+
+TITLE_BANNER = banner_art(-7, -25, [
+    "                               _         ",
+    "  ___  _ __   ___   _ __ _   _| | ___    ",
+    " / _ \| '_ \ / _ \ | '__| | | | |/ _ \   ",
+    "| (_) | | | |  __/ | |  | |_| | |  __/_  ",
+    " \___/|_| |_|\___| |_|   \__,_|_|\___(_) ",
+    "     _             _     ____ ___ _____  ",
+    "  __| | ___  _ __ | |_  |  _ \_ _| ____| ",
+    " / _` |/ _ \| '_ \| __| | | | | ||  _|   ",
+    "| (_| | (_) | | | | |_  | |_| | || |___  ",
+    " \__,_|\___/|_| |_|\__| |____/___|_____| ",
+]) + banner_art(-5, 20, [  # A box with the game controls
+    "+------------------+",
+    "|  Game Controls   |",
+    "|------------------|",
+    "| SPACE or W: Jump |",
+    "| A: Move Left     |",
+    "| D: Move Right    |",
+    "| S: Hold Position |",
+    "| P: Autopilot     |",
+    "+------------------+",
+]) + [(4, -10, "Press Enter to start")]
+
+HIGH_SCORES_BANNER = banner_art(-7, -30, [
+    " _                   _           ____                      _ ",
+    "| |    ___  __ _  __| | ___ _ __| __ )  ___   __ _ _ __ __| |",
+    "| |   / _ \/ _` |/ _` |/ _ \ '__|  _ \ / _ \ / _` | '__/ _` |",
+    "| |__|  __/ (_| | (_| |  __/ |  | |_) | (_) | (_| | | | (_| |",
+    "|_____\___|\__,_|\__,_|\___|_|  |____/ \___/ \__,_|_|  \__,_|",
+]) + [(0, -10, "Top 10 High Scores")] + [(i + 1, -10, "") for i in range(10)] + [
+    (13, -10, "Press Enter to return to the main menu")]
+
+LEVEL_UP_BANNER = banner_art(-5, -30, [
+    " _   _ _              _   _                   __              ",
+    "| \\ | (_) ___ ___    | |_(_)_ __ ___   ___   / _| ___  _ __   ",
+    "|  \\| | |/ __/ _ \\   | __| | '_ ` _ \\ / _ \\ | |_ / _ \\| '__|  ",
+    "| |\\  | | (_|  __/_  | |_| | | | | | |  __/ |  _| (_) | |     ",
+    "|_| \\_|_|\\___\\___( )  \\__|_|_| |_| |_|\\___| |_|  \\___/|_|     ",
+    "  __ _ _ __   ___|/ |_| |__   ___ _ __    ___  _ __   ___     ",
+    " / _` | '_ \\ / _ \\| __| '_ \\ / _ \\ '__|  / _ \\| '_ \\ / _ \\    ",
+    "| (_| | | | | (_) | |_| | | |  __/ |    | (_) | | | |  __/_ _ ",
+    " \\__,_|_| |_|\\___/ \\__|_| |_|\\___|_|     \\___/|_| |_|\\___(_|_)",
+]) + [(5, -10, "")]
+
+LAST_LIFE_BANNER = banner_art(-5, -30, [
+    " _        _    ____ _____   _     ___ _____ _____ _ ",
+    "| |      / \  / ___|_   _| | |   |_ _|  ___| ____| |",
+    "| |     / _ \ \___ \ | |   | |    | || |_  |  _| | |",
+    "| |___ / ___ \ ___) || |   | |___ | ||  _| | |___|_|",
+    "|_____/_/   \_\____/ |_|   |_____|___|_|   |_____(_)",
+]) + [(1, -10, "Press Enter to continue")]
+
+LIFE_LOST_BANNER = banner_art(-3, -30, [
+    " _____ _           _     _                _        ",
+    "|_   _| |__   __ _| |_  | |__  _   _ _ __| |_      ",
+    "  | | | '_ \\ / _` | __| | '_ \\| | | | '__| __|     ",
+    "  | | | | | | (_| | |_  | | | | |_| | |  | |_ _ _   ",
+    " _|_| |_| |_|\\__,_|\\__| |_| |_|\\__,_|_|  \\__(_|_)  ",
+    "|_ _| | | ___  ___| |_    __ _  | (_)/ _| ___       ",
+    " | |  | |/ _ \\/ __| __|  / _` | | | | |_ / _ \\      ",
+    " | |  | | (_) \\__ \\ |_  | (_| | | | |  _|  __/     ",
+    "  |___| |_|\\___/|___/\\__|  \\__,_| |_|_|_|  \\___|      ",
+]) + [(6, -10, ""), (8, -10, "Press Enter to continue")]
+
+GAME_OVER_BANNER = banner_art(-7, -30, [
+    "     _     _ _             _                _                            ",
+    " ___| |__ (_) |_        __| | ___  __ _  __| |                           ",
+    "/ __| '_ \| | __|      / _` |/ _ \/ _` |/ _` |                           ",
+    "\__ \ | | | | |_ _ _  | (_| |  __/ (_| | (_| |                           ",
+    "|___/_| |_|_|\__(_|_)  \__,_|\___|\__,_|\__,_|                           ",
+    "       _                    _      ___   _      _         _              ",
+    "  __ _| |_ __ ___  __ _  __| |_   |__ \ | | ___| |_ ___  | |_ _ __ _   _ ",
+    " / _` | | '__/ _ \/ _` |/ _` | | | |/ / | |/ _ \ __/ __| | __| '__| | | |",
+    "| (_| | | | |  __/ (_| | (_| | |_| |_|  | |  __/ |_\__ \ | |_| |  | |_| |",
+    " \__,_|_|_|  \___|\__,_|\__,_|\__, (_)  |_|\___|\__|___/  \__|_|   \__, |",
+    "                              |___/                                |___/ ",
+]) + [(5, -10, ""), (6, -10, ""), (8, -10, ""), (9, -10, ""), (11, -10, "")]
+
+# A banner drawn once into an off-screen pad. Showing it blanks the window,
+# copies the pad onto the middle of the screen (clipped to fit) and sends
+# both in a single update, instead of redrawing the art line by line.
+class Banner:
+    def __init__(self, lines):
+        self.top = min(dy for dy, _, _ in lines)
+        self.left = min(dx for _, dx, _ in lines)
+        self.height = max(dy for dy, _, _ in lines) - self.top + 1
+        self.width = max(dx + len(text) for _, dx, text in lines) - self.left
+        # One spare row and column: curses refuses to write the last cell of a pad
+        self.pad = curses.newpad(self.height + 1, self.width + 1)
+        for dy, dx, text in lines:
+            self.text(dy, dx, text)
+
+    # Replace the rest of a row, from column `dx`, with `text`
+    def text(self, dy, dx, text):
+        row, col = dy - self.top, dx - self.left
+        self.pad.move(row, col)
+        self.pad.clrtoeol()
+        self.pad.addstr(row, col, text[:self.width - col])
+
+    def show(self, win):
+        sh, sw = win.getmaxyx()
+        begin_y, begin_x = win.getbegyx()
+        win.erase()
+        win.noutrefresh()
+        y, x = sh // 2 + self.top, sw // 2 + self.left
+        top, left = max(y, 0), max(x, 0)
+        bottom, right = min(y + self.height, sh) - 1, min(x + self.width, sw) - 1
+        if bottom >= top and right >= left:
+            self.pad.noutrefresh(top - y, left - x, begin_y + top, begin_x + left,
+                                 begin_y + bottom, begin_x + right)
+        curses.doupdate()
+
+banners = {}  # Each banner's pad, built the first time it is shown
+
+def get_banner(lines):
+    banner = banners.get(id(lines))
+    if banner is None:
+        banner = banners[id(lines)] = Banner(lines)
+    return banner
+
+# Block until Enter is pressed, showing the banner again if the terminal is
+# resized meanwhile. Returns whether it was resized.
+def wait_for_enter(win, banner=None):
+    win.timeout(-1)
+    resized = False
+    while True:
+        key = win.getch()
+        if key == ord("\n") or key == curses.KEY_ENTER:
+            return resized
+        if key == curses.KEY_RESIZE:
+            resized = True
+            if banner is not None:
+                banner.show(win)
 
 def display_high_scores(stdscr):
+    banner = get_banner(HIGH_SCORES_BANNER)
     high_scores = load_high_scores()
-    sh, sw = stdscr.getmaxyx()
-    stdscr.clear()
-    stdscr.addstr(sh // 2 - 7, sw // 2 - 30, " _                   _           ____                      _ ")
-    stdscr.addstr(sh // 2 - 6, sw // 2 - 30, "| |    ___  __ _  __| | ___ _ __| __ )  ___   __ _ _ __ __| |")
-    stdscr.addstr(sh // 2 - 5, sw // 2 - 30, "| |   / _ \/ _` |/ _` |/ _ \ '__|  _ \ / _ \ / _` | '__/ _` |")
-    stdscr.addstr(sh // 2 - 4, sw // 2 - 30, "| |__|  __/ (_| | (_| |  __/ |  | |_) | (_) | (_| | | | (_| |")
-    stdscr.addstr(sh // 2 - 3, sw // 2 - 30, "|_____\___|\__,_|\__,_|\___|_|  |____/ \___/ \__,_|_|  \__,_|")
-    stdscr.addstr(sh // 2, sw // 2 - 10, "Top 10 High Scores")
-
-    for i, (score, name, level) in enumerate(high_scores):
-        stdscr.addstr(sh // 2 + i + 1, sw // 2 - 10, f"{i + 1}. {name} - {score} (Level {level})")
-
-    stdscr.addstr(sh // 2 + 13, sw // 2 - 10, "Press Enter to return to the main menu")
-    stdscr.refresh()
+    for i in range(10):
+        entry = ""
+        if i < len(high_scores):
+            score, name, level = high_scores[i]
+            entry = f"{i + 1}. {name} - {score} (Level {level})"
+        banner.text(i + 1, -10, entry)
+    banner.show(stdscr)
 
     # Wait for "Enter" to return to the main menu
+    wait_for_enter(stdscr, banner)
+
+GRASS_TYPES = [
+    ('⠀⠀⣴⣄⠀⢰⡏⣸⠀⣴⠏', '⠀⢠⣿⠙⣦⡟⢠⣿⣿⢏⡀'),
+    ('⠀⠀⠀⠀⣿⣇⠀⠀⢠⣧⠀⠀⢀⣀', '⠰⣶⣀⠀⠀⣿⢿⡄⣸⡿⣿⣤⡶⣿⠏'),
+    ('⠀⠀⠀⠀⠀⠀⠀⠀⠀⣰⣇⠀⣀⠀⠀⢀⣴⡶⣩⠿⠋⠁', '⠀⠀⠠⢤⣤⣄⡀⠀⢀⡿⣿⣼⣻⢁⣴⠟⢥⣿⠟⠁⠀⠀'),
+    ('⠀⠀  ⠀⣰⠇       ', '⣄⠀⢠⣾⡏⢀⣠⣾⠆')
+]
+
+STRUCTURE_LINES = [
+    "  /\  ",
+    " /  \\",
+    "/____\\",
+    "| [] |",
+    "|____|"
+]
+
+MOUNTAIN_LINES = [
+    "    .                  .-.    .  _   *     _   .",
+    "           *          /   \     ((       _/ \       *    .",
+    "         _    .   .--'/\_ \     `      /    \  *    ___",
+    "     *  / \_    _/ ^      ' __        /\/\  /\  __/   \ *",
+    "       /    \  /    .'   _/  /  \  *' /    \/  \/ .`'\_/\   .",
+    "  .   /\/\  /\/ :' __  ^/  ^/    `--./.'  ^  `-.\ _    _:\ _",
+    "     /    \/  \  _/  \-' __/.' ^ _   \_   .'\   _/ \ .  __/",
+    "   /\  .-   `. \/     \ / -.   _/ \ -. `_/   \ /    `._/  ^  ",
+    "  /  `-.__ ^   / .-'.--'    . /    `--./ .-'  `-.  `-. `.  -  `.",
+    "@/        `.  / /      `-.   /  .-'   / .   .'   \    \  \  .-  \%"
+]
+
+PLAYER_LINES = [" 0 ", "/|\\", "/| "]
+
+# Obstacle kind codes
+KIND_2X2 = 0
+KIND_5X3 = 1
+KIND_NEW = 2
+OBSTACLE_KIND_NAMES = ('2x2', '5x3', 'new')
+OBSTACLE_DEATHS = tuple(f"{name} obstacle" for name in OBSTACLE_KIND_NAMES)  # GameState.death_cause by kind
+
+OBSTACLE_LINES = {
+    '2x2': ["\\/", "/\\"],
+    '5x3': ["./-\\. ", "< 8 >", "^\\-/^"],
+    'new': ["/\\", "\\/"],
+}
+
+# Number of terminal columns a character occupies
+def char_width(ch):
+    if unicodedata.combining(ch):
+        return 0
+    return 2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1
+
+# A sprite rendered once into terminal cells. Each line becomes one cell per
+# column; a double-width character fills its first cell and leaves "" in the
+# second. Clipped views are cached per visible column range, so drawing a
+# sprite partly off the left or right edge is a dictionary lookup.
+class Sprite:
+    def __init__(self, lines):
+        self.lines = tuple(lines)
+        self.cells = []
+        for line in self.lines:
+            row = []
+            for ch in line:
+                width = char_width(ch)
+                if width == 0 and row:
+                    row[-1] += ch  # Combining mark joins the previous cell
+                elif width == 2:
+                    row += [ch, ""]
+                else:
+                    row.append(ch)
+            self.cells.append(tuple(row))
+        self.widths = tuple(len(row) for row in self.cells)  # Display width of each line
+        self.width = max(self.widths)
+        self.height = len(self.cells)
+        # Bit x of mask[y] is set where cell (x, y) shows something, for
+        # collisions that match what is drawn
+        self.mask = tuple(sum(1 << x for x in range(len(row)) if row[x - 1 if row[x] == "" else x] not in BLANK_CELLS)
+                          for row in self.cells)
+        self._clips = {}
+
+    # Visible parts when drawn at column x of a screen sw columns wide, as a
+    # tuple of (row offset, column offset, cells, text)
+    def clipped(self, x, sw):
+        key = (max(0, -x), min(self.width, sw - x))
+        clip = self._clips.get(key)
+        if clip is None:
+            clip = self._clips[key] = self._clip(*key)
+        return clip
+
+    def _clip(self, left, right):
+        parts = []
+        for dy, row in enumerate(self.cells):
+            end = min(right, len(row))
+            if end <= left:
+                continue
+            cells = list(row[left:end])
+            if cells[0] == "":
+                cells[0] = " "  # Right half of a wide character cut at the left edge
+            if end < len(row) and row[end] == "":
+                cells[-1] = " "  # Left half of a wide character cut at the right edge
+            parts.append((dy, left, tuple(cells), "".join(cells)))
+        return tuple(parts)
+
+BLANK_CELLS = (" ", "\u2800")  # A space and the empty braille pattern
+
+# Whether the drawn cells of sprite `b`, placed dx columns right of and dy
+# rows below sprite `a`, touch any of a's. Only the rows both cover are
+# compared, a row at a time as bit masks.
+def masks_overlap(a, b, dx, dy):
+    a_mask, b_mask = a.mask, b.mask
+    for y in range(max(0, dy), min(len(a_mask), dy + len(b_mask))):
+        row = b_mask[y - dy]
+        if a_mask[y] & (row << dx if dx >= 0 else row >> -dx):
+            return True
+    return False
+
+# Build every sprite the game draws, once at startup
+def build_sprite_atlas():
+    atlas = {
+        "structure": Sprite(STRUCTURE_LINES),
+        "mountain": Sprite(MOUNTAIN_LINES),
+        "player": Sprite(PLAYER_LINES),
+    }
+    for kind, lines in OBSTACLE_LINES.items():
+        atlas["obstacle_" + kind] = Sprite(lines)
+    for i, lines in enumerate(GRASS_TYPES):
+        atlas[f"grass_{i}"] = Sprite(lines)
+    return atlas
+
+SPRITES = build_sprite_atlas()
+GRASS_SPRITES = [SPRITES[f"grass_{i}"] for i in range(len(GRASS_TYPES))]
+PLAYER_SPRITE = SPRITES["player"]
+# Sprite by obstacle kind code
+OBSTACLE_SPRITES = [SPRITES["obstacle_" + name] for name in OBSTACLE_KIND_NAMES]
+# Hit box (width, height) by kind code: the extent of the drawn cells, which
+# prefilters the cell-exact test
+OBSTACLE_SIZES = tuple((max(row.bit_length() for row in sprite.mask), sprite.height) for sprite in OBSTACLE_SPRITES)
+MAX_OBSTACLE_WIDTH = max(width for width, _ in OBSTACLE_SIZES)  # Bounds collision queries
+
+TICK_RATE = 20  # Simulation ticks per second
+TICK_INTERVAL = 1.0 / TICK_RATE  # Seconds per simulation tick
+FRAME_RATE = 30  # Frames drawn per second when the simulation has its own thread
+MAX_CATCH_UP_TICKS = 5  # Most ticks run back-to-back when frames run late
+
+# Events reported by step()
+LIFE_LOST = "life_lost"
+LEVEL_UP = "level_up"
+
+# What ended a life, kept in GameState.death_cause
+DEATH_LEFT_EDGE = "left edge"
+DEATH_TIMEOUT = "timeout"  # Used by headless runs that cap a game's length
+
+# Knobs that set how hard the game is and how fast it gets harder. The
+# defaults are the hand-tuned values; scroller_batch.py sweeps the rest.
+class Difficulty:
+    def __init__(self, level_points=500, speed_growth=1.2, obstacle_chance=0.7,
+                 kind_2x2_below=0.5, kind_5x3_below=0.8, structure_chance=0.01, structure_chance_step=0.05):
+        self.level_points = level_points  # Score between level-ups
+        self.speed_growth = speed_growth  # Obstacle speed multiplier per level
+        self.obstacle_chance = obstacle_chance  # Chance per tick of spawning once the gap allows
+        self.kind_2x2_below = kind_2x2_below  # Spawn rolls below this are 2x2 obstacles,
+        self.kind_5x3_below = kind_5x3_below  # then 5x3 up to this, and 'new' above it
+        self.structure_chance = structure_chance  # Structure chance per tick on levels 2 and 3
+        self.structure_chance_step = structure_chance_step  # Added per level after 3
+
+    FIELDS = ("level_points", "speed_growth", "obstacle_chance", "kind_2x2_below",
+              "kind_5x3_below", "structure_chance", "structure_chance_step")
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+DEFAULT_DIFFICULTY = Difficulty()
+
+JUMP_KEYS = (ord(" "), ord("w"))
+HOLD_KEYS = (ord("s"), curses.KEY_DOWN)
+
+MAX_STARS = 90  # Default number of stars in the background
+
+CODE_TYPE = "I" if array("I").itemsize == 4 else "L"  # 32-bit codepoints for array fallbacks
+CODE_ENCODING = "utf-32-le" if sys.byteorder == "little" else "utf-32-be"
+STAR_CODE = ord("*")
+
+# An array of character codepoints; frame backgrounds are rasterized into
+# these and decoded to text in one call
+def new_codes(values):
+    if np is not None:
+        return np.array(values, dtype=np.uint32)
+    return array(CODE_TYPE, values)
+
+# A background layer of points (stars, mountain anchors) that all scroll left
+# at the same speed, stored as parallel x and y arrays. With NumPy, moving,
+# wrapping and rasterizing the layer are whole-array operations; without it,
+# the same work runs over array.array columns.
+class ParallaxLayer:
+    def __init__(self, xs, ys, speed, sw, sh, min_x, respawn_y=None, rng=random):
+        if np is not None:
+            self.xs = np.array(xs, dtype=np.float64)
+            self.ys = np.array(ys, dtype=np.float64)
+        else:
+            self.xs = array("d", xs)
+            self.ys = array("d", ys)
+        self.speed = speed
+        self.sw = sw
+        self.sh = sh
+        self.min_x = min_x  # Points left of this wrap around to the right edge
+        self.respawn_y = respawn_y  # Row for wrapped points; None picks a random row
+        self.rng = rng
+        if np is not None:
+            # Scratch arrays reused every tick so scrolling and drawing allocate nothing
+            count = len(self.xs)
+            self._wrapped = np.empty(count, dtype=bool)
+            self._cols = np.empty(count, dtype=np.intp)
+            self._rows = np.empty(count, dtype=np.intp)
+            self._cells = np.empty(count, dtype=np.intp)
+
+    def __len__(self):
+        return len(self.xs)
+
+    # (x, y) pairs as plain Python numbers
+    def positions(self):
+        if np is not None:
+            return zip(self.xs.tolist(), self.ys.tolist())
+        return zip(self.xs, self.ys)
+
+    # Row for each point that wrapped, in index order
+    def _respawn_rows(self, count):
+        if self.respawn_y is not None:
+            return [self.respawn_y] * count
+        return [self.rng.randint(0, self.sh - 1) for _ in range(count)]
+
+    # Move every point left and wrap the ones that left the screen
+    def scroll(self):
+        xs, ys = self.xs, self.ys
+        if np is not None:
+            xs -= self.speed
+            np.less(xs, self.min_x, out=self._wrapped)
+            if self._wrapped.any():
+                wrapped = np.flatnonzero(self._wrapped)
+                xs[wrapped] = self.sw - 1
+                ys[wrapped] = self._respawn_rows(len(wrapped))
+            return
+        wrapped = []
+        for i in range(len(xs)):
+            xs[i] -= self.speed
+            if xs[i] < self.min_x:
+                wrapped.append(i)
+        for i, row in zip(wrapped, self._respawn_rows(len(wrapped))):
+            xs[i] = self.sw - 1
+            ys[i] = row
+
+    # A copy of the layer with every point moved `shift` columns right
+    def copy(self, shift=0.0):
+        xs = self.xs + shift if np is not None else [x + shift for x in self.xs]
+        return ParallaxLayer(xs, self.ys, self.speed, self.sw, self.sh, self.min_x, self.respawn_y, self.rng)
+
+    # Fit the layer to a new screen size, wrapping points that are now past
+    # the right or bottom edge back onto the screen. A new respawn_y also
+    # moves every point to that row.
+    def resize(self, sw, sh, respawn_y=None):
+        self.sw = sw
+        self.sh = sh
+        xs, ys = self.xs, self.ys
+        if respawn_y is not None:
+            self.respawn_y = respawn_y
+        if np is not None:
+            np.remainder(xs, sw, out=xs, where=xs >= sw)
+            if respawn_y is not None:
+                ys.fill(respawn_y)
+            else:
+                np.remainder(ys, sh, out=ys, where=ys >= sh)
+            return
+        for i in range(len(xs)):
+            if xs[i] >= sw:
+                xs[i] %= sw
+            if respawn_y is not None:
+                ys[i] = respawn_y
+            elif ys[i] >= sh:
+                ys[i] %= sh
+
+    # Set each on-screen point's cell in a row-major codepoint buffer. With
+    # `count`, only the first that many points are drawn.
+    def rasterize(self, codes, code=STAR_CODE, count=None):
+        sw, sh = self.sw, self.sh
+        if count is None:
+            count = len(self.xs)
+        if np is not None:
+            if not count:
+                return
+            xs, ys, cols, rows, cells = self.xs, self.ys, self._cols, self._rows, self._cells
+            if count < len(xs):
+                xs, ys, cols, rows, cells = xs[:count], ys[:count], cols[:count], rows[:count], cells[:count]
+            np.copyto(cols, xs, casting="unsafe")  # Truncates like int()
+            np.copyto(rows, ys, casting="unsafe")
+            np.multiply(rows, sw, out=cells)
+            cells += cols
+            if cols.min() >= 0 and cols.max() < sw and rows.min() >= 0 and rows.max() < sh:
+                codes[cells] = code
+            else:
+                visible = (cols >= 0) & (cols < sw) & (rows >= 0) & (rows < sh)
+                codes[cells[visible]] = code
+            return
+        xs, ys = self.xs, self.ys
+        for i in range(count):
+            col, row = int(xs[i]), int(ys[i])
+            if 0 <= col < sw and 0 <= row < sh:
+                codes[row * sw + col] = code
+
+# Everything needed to simulate one life of the game; no curses involved
+class GameState:
+    def __init__(self, sh, sw, lives=4, score=0, obstacle_speed_multiplier=1.0, high_score=0, level_number=1,
+                 max_stars=MAX_STARS, seed=None, difficulty=DEFAULT_DIFFICULTY,
+                 world_executor=None):
+        # Gameplay randomness comes only from this seed, so a life can be
+        # replayed exactly; stars get their own stream so that drawing
+        # options never change where obstacles spawn
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed)
+        self.fx_rng = random.Random(self.rng.getrandbits(64))
+
+        self.sh = sh  # Screen height
+        self.sw = sw  # Screen width
+        self.lives = lives
+        self.score = score
+        self.obstacle_speed_multiplier = obstacle_speed_multiplier
+        self.high_score = high_score
+        self.level_number = level_number
+        self.time = 0.0  # Simulated seconds since this life started
+        self.ticks = 0
+        self.profiler = None  # FrameProfiler timing each phase of step(), if any
+        self.difficulty = difficulty
+        self.death_cause = None  # Set when step() returns LIFE_LOST
+
+        # Player starting position and state
+        self.player_x = sw // 6
+        self.player_y = sh - 4  # Start player on the ground level
+        self.player_width = 3  # Width of the player character
+        self.player_height = 3  # Height of the player character
+        self.velocity = 0  # Upward velocity for jumping
+        self.is_jumping = False
+        # Where the player was when collisions were last resolved
+        self.last_player_x = self.player_x
+        self.last_player_y = self.player_y
+
+        # Movement controls
+        self.move_left = False
+        self.move_right = False
+        self.hold_position = False
+
+        # Obstacles, structures and grass live in world columns; screen x is
+        # world x minus scroll, the distance the ground has moved so far
+        self.scroll = 0
+
+        # Obstacles
+        self.obstacles = ScrollLane()
+        self.obstacle_pool = EntityPool(Obstacle)
+        self.obstacle_gap = 30  # Increase gap for larger obstacles
+        self.base_obstacle_speed = 2  # Base speed for consistent gameplay
+        self.obstacle_speed = self.base_obstacle_speed * obstacle_speed_multiplier
+
+        # Grass structures
+        self.grass_structures = ScrollLane()
+        self.grass_pool = EntityPool(Grass)
+
+        # Additional structures
+        self.structures = ScrollLane()
+        self.structure_pool = EntityPool(Structure)
+
+        # Everything above scrolls in from a world generated a chunk at a time
+        self.world = WorldGenerator(self, self.rng.getrandbits(64), world_executor)
+
+        # Stars
+        self.star_speed = 0.5  # Star scroll speed, slower for parallax effect
+        self.max_stars = max_stars  # Maximum number of stars on screen at a time
+        self.stars = ParallaxLayer(
+            [self.fx_rng.randint(0, sw - 1) for _ in range(max_stars)],
+            [self.fx_rng.randint(0, sh - 1) for _ in range(max_stars)],
+            self.star_speed, sw, sh, min_x=0, rng=self.fx_rng)
+
+        # Mountains (only on levels divisible by 3)
+        self.mountain_speed = 0.8  # Mountain scroll speed, slightly faster than stars
+        self.mountain_y = sh - 10  # Position of the mountains vertically at ground level
+        mountain_xs = list(range(0, sw, 40)) if level_number % 3 == 0 else []
+        self.mountains = ParallaxLayer(mountain_xs, [self.mountain_y] * len(mountain_xs),
+                                       self.mountain_speed, sw, sh, min_x=-40, respawn_y=self.mountain_y)
+
+    # Carry on the current life on a screen of a different size: the player,
+    # entities and background layers are moved onto the new screen, and
+    # world x positions stay as they are
+    def resize(self, sh, sw):
+        self.sh = sh
+        self.sw = sw
+        self.player_x = max(0, min(self.player_x, sw - self.player_width))
+        self.player_y = min(self.player_y, sh - self.player_height - 1)
+        self.last_player_x, self.last_player_y = self.player_x, self.player_y  # Not a move to sweep
+        for obs in self.obstacles:
+            obs.y = max(2, min(obs.y, sh - 5))
+        for structure in self.structures:
+            structure.y = sh - 6
+        for grass in self.grass_structures:
+            grass.y = sh - 1
+        self.stars.resize(sw, sh)
+        self.mountain_y = sh - 10
+        self.mountains.resize(sw, sh, self.mountain_y)
+
+    # The tuple game_loop() hands back to main() when this life ends
+    def result(self):
+        return True, self.score, self.obstacle_speed_multiplier, self.high_score, self.level_number
+
+    # A snapshot to play ahead from without touching this state. Ticks
+    # never edit an entity, only add and drop them, so the clone copies the
+    # lanes but shares the entities, and its world carries on generating
+    # the same chunks inline. It skips the background layers, which never
+    # affect play, and never recycles entities, since they are shared.
+    def clone(self):
+        state = object.__new__(GameState)
+        state.__dict__.update(self.__dict__)
+        state.profiler = None
+        state.obstacles = self.obstacles.copy()
+        state.structures = self.structures.copy()
+        state.grass_structures = self.grass_structures.copy()
+        state.obstacle_pool, state.structure_pool, state.grass_pool = CLONE_POOLS
+        state.world = self.world.copy()
+        state.stars = state.mountains = NO_BACKGROUND
+        return state
+
+# Apply one key press to the movement controls
+def apply_key(state, key):
+    if key in JUMP_KEYS:  # Space bar or "W" to jump
+        if not state.is_jumping:  # Only allow jumping if on the ground
+            state.velocity = -2  # Initial jump velocity
+            state.is_jumping = True
+    elif key == ord("a"):  # "A" key for moving left
+        state.move_left = True
+        state.move_right = False
+        state.hold_position = False
+    elif key == ord("d"):  # "D" key for moving right
+        state.move_right = True
+        state.move_left = False
+        state.hold_position = False
+    elif key in HOLD_KEYS:  # "S" key or down arrow to hold position
+        state.hold_position = True
+        state.move_left = state.move_right = False
+
+# Each tick's input reduces to one small action code: bit 0 is a jump, the
+# rest says what happened to the movement controls. Recording and replaying
+# these codes reproduces a game exactly.
+ACTION_JUMP = 1
+MOVE_KEEP = 0  # Keys were pressed but none of them moves the player
+MOVE_LEFT = 1
+MOVE_RIGHT = 2
+MOVE_HOLD = 3
+MOVE_RELEASE = 4  # Nothing pressed this tick
+ACTION_CODES = (MOVE_RELEASE << 1) + 2
+NO_KEY = -1  # A key that changes nothing, what getch() returns with no input
+
+# Action code for the keys pressed during one tick
+def encode_inputs(keys):
+    if not keys:
+        return MOVE_RELEASE << 1
+    jump = 0
+    move = MOVE_KEEP
+    for key in keys:
+        if key in JUMP_KEYS:
+            jump = ACTION_JUMP
+        elif key == ord("a"):
+            move = MOVE_LEFT
+        elif key == ord("d"):
+            move = MOVE_RIGHT
+        elif key in HOLD_KEYS:
+            move = MOVE_HOLD
+    return jump | move << 1
+
+# The shortest key sequence with the same effect as an action code
+def action_keys(code):
+    keys = [JUMP_KEYS[0]] if code & ACTION_JUMP else []
+    move = code >> 1
+    if move == MOVE_LEFT:
+        keys.append(ord("a"))
+    elif move == MOVE_RIGHT:
+        keys.append(ord("d"))
+    elif move == MOVE_HOLD:
+        keys.append(HOLD_KEYS[0])
+    elif move == MOVE_KEEP and not keys:
+        keys.append(NO_KEY)
+    return tuple(keys)
+
+ACTION_KEYS = [action_keys(code) for code in range(ACTION_CODES)]
+
+# Terminals report key presses, and auto-repeats while a key stays down, but
+# never releases. A key counts as held once its auto-repeat starts, and is
+# released when the repeats stop or another key is pressed (which is what
+# ends a terminal's auto-repeat).
+KEY_PRESS = "press"
+KEY_REPEAT = "repeat"
+KEY_RELEASE = "release"
+KEY_REPEAT_DELAY = 0.6  # Longest wait for a key's first auto-repeat, in seconds
+KEY_REPEAT_GAP = 0.1  # Longest gap between auto-repeats of a held key
+
+# Key-state table fed with every key as it arrives. Each tick takes one
+# snapshot: the keys pressed or repeated since the last snapshot, in order,
+# plus the held key, so holding a key down moves the player on every tick
+# rather than only on the ticks a repeat happened to land in.
+class KeyInput:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.key = None  # The last key pressed, while it may still be down
+        self.held = False  # Whether that key is auto-repeating
+        self.pressed_at = 0.0
+        self.seen_at = 0.0  # Time of its last press or repeat
+        self.events = []  # (kind, key, time) since the last snapshot
+        self.lock = threading.Lock()  # Keys may arrive on one thread and be taken on another
+
+    def press(self, key, now=None):
+        now = self.clock() if now is None else now
+        with self.lock:
+            self.expire(now)
+            if key == self.key:
+                self.held = True
+                self.seen_at = now
+                self.events.append((KEY_REPEAT, key, now))
+                return
+            self.release(now)
+            self.key = key
+            self.pressed_at = self.seen_at = now
+            self.events.append((KEY_PRESS, key, now))
+
+    def release(self, now):
+        if self.key is not None:
+            if self.held:
+                self.events.append((KEY_RELEASE, self.key, now))
+            self.key = None
+            self.held = False
+
+    # Forget the last key once its next repeat is overdue
+    def expire(self, now):
+        if self.key is not None:
+            if self.held:
+                if now - self.seen_at > KEY_REPEAT_GAP:
+                    self.release(self.seen_at + KEY_REPEAT_GAP)
+            elif now - self.pressed_at > KEY_REPEAT_DELAY:
+                self.release(now)
+
+    # Block for up to `timeout_ms` for a key, then take every other key
+    # already queued without waiting. Returns True, leaving the rest of the
+    # queue alone, if the terminal was resized.
+    def read(self, win, timeout_ms):
+        win.timeout(timeout_ms)
+        key = win.getch()
+        if key == -1:
+            return False
+        win.timeout(0)
+        while key != -1:
+            if key == curses.KEY_RESIZE:
+                return True
+            self.press(key)
+            key = win.getch()
+        return False
+
+    # The keys for one tick, with the same meaning as step()'s `inputs`
+    def snapshot(self):
+        with self.lock:
+            self.expire(self.clock())
+            keys = [key for kind, key, _ in self.events if kind != KEY_RELEASE]
+            if self.held and self.key not in keys:
+                keys.append(self.key)
+            self.events.clear()
+        return keys
+
+# Advance the game by one tick. `inputs` holds the keys pressed since the
+# previous tick, in order; an empty sequence means no key is down, which
+# releases the movement controls. Returns LIFE_LOST, LEVEL_UP or None.
+def step(state, inputs, dt=TICK_INTERVAL):
+    if inputs:
+        for key in inputs:
+            apply_key(state, key)
+    else:  # No input
+        state.move_left = state.move_right = state.hold_position = False
+
+    state.time += dt
+    state.ticks += 1
+    sh, sw = state.sh, state.sw
+
+    # Apply gravity to the player at all times
+    state.velocity += 0.2  # Gravity effect
+    state.player_y += state.velocity
+
+    # Ensure player stays within vertical bounds
+    if state.player_y > sh - state.player_height - 1:  # Ground level for the player
+        state.player_y = sh - state.player_height - 1
+        state.velocity = 0
+        state.is_jumping = False
+    elif state.player_y < 0:  # Prevent player from going above the screen
+        state.player_y = 0
+        state.velocity = 0
+
+    # Apply horizontal movement
+    if state.move_left:
+        state.player_x -= 1
+        if state.player_x < 0:  # Lose a life if player moves off the left side
+            state.death_cause = DEATH_LEFT_EDGE
+            return LIFE_LOST
+    elif state.move_right:
+        state.player_x = min(sw - state.player_width, state.player_x + 1)  # Ensure player stays in bounds
+
+    if state.profiler is None:
+        spawn_entities(state)
+        move_background(state)
+        hit = move_entities(state)
+    else:
+        hit = state.profiler.time_step_phases(state)
+    if hit:
+        return LIFE_LOST  # Lose a life upon collision
+
+    # Update score and high score
+    state.score += 1
+    if state.score > state.high_score:
+        state.high_score = state.score
+
+    # Check for level-up
+    difficulty = state.difficulty
+    if state.score % difficulty.level_points == 0:
+        state.obstacle_speed_multiplier *= difficulty.speed_growth  # Increase obstacle speed (20% by default)
+        state.level_number += 1  # Increase level number
+        return LEVEL_UP
+    return None
+
+# Scrolling entities. x is a world column (see ScrollLane), y a screen row.
+class Obstacle:
+    __slots__ = ("x", "y", "kind")
+
+    def __init__(self, x, y, kind):
+        self.x = x
+        self.y = y
+        self.kind = kind  # KIND_2X2, KIND_5X3 or KIND_NEW
+
+class Structure:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+class Grass:
+    __slots__ = ("x", "y", "height", "sprite")
+
+    def __init__(self, x, y, height, sprite):
+        self.x = x
+        self.y = y
+        self.height = height
+        self.sprite = sprite
+
+# Free list of entities that have scrolled off screen, reused for new spawns
+# so a running game stops allocating entity objects
+class EntityPool:
+    def __init__(self, cls, reuse=True):
+        self.cls = cls
+        self.reuse = reuse  # False makes released entities go to the garbage collector instead
+        self.free = []
+        self.created = 0  # Entities built because the free list was empty
+
+    def acquire(self, *fields):
+        if self.free:
+            entity = self.free.pop()
+            entity.__init__(*fields)
+            return entity
+        self.created += 1
+        return self.cls(*fields)
+
+    def release(self, entity):
+        if self.reuse:
+            self.free.append(entity)
+
+# Entities that scroll left together (obstacles, structures or grass), kept
+# sorted by x in a deque. x is stored in world columns, i.e. screen column
+# plus GameState.scroll, so scrolling never touches the entities and the
+# sorted order lets range queries look only at nearby entries.
+class ScrollLane:
+    def __init__(self):
+        self.items = deque()
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    # A lane holding the same entities, which either lane can add or drop
+    # without affecting the other
+    def copy(self):
+        lane = ScrollLane.__new__(ScrollLane)
+        lane.items = self.items.copy()
+        return lane
+
+    # Add an entity, keeping the lane sorted by world x
+    def add(self, entity):
+        items = self.items
+        if not items or items[-1].x <= entity.x:
+            items.append(entity)  # Spawns arrive at the right edge, so this is the usual case
+        else:
+            items.insert(bisect.bisect_right(items, entity.x, key=entity_x), entity)
+
+    # Drop the entities at or left of world column x, handing them back to
+    # `pool` for reuse; returns how many were dropped
+    def expire(self, x, pool=None):
+        items = self.items
+        count = 0
+        while items and items[0].x <= x:
+            entity = items.popleft()
+            if pool is not None:
+                pool.release(entity)
+            count += 1
+        return count
+
+    # Entities with lo < world x < hi
+    def between(self, lo, hi):
+        items = self.items
+        i = bisect.bisect_right(items, lo, key=entity_x)
+        found = []
+        while i < len(items) and items[i].x < hi:
+            found.append(items[i])
+            i += 1
+        return found
+
+    # True if any entity has lo < world x < hi
+    def any_between(self, lo, hi):
+        items = self.items
+        i = bisect.bisect_right(items, lo, key=entity_x)
+        return i < len(items) and items[i].x < hi
+
+entity_x = operator.attrgetter("x")
+
+# The world is generated in chunks of WORLD_CHUNK_WIDTH columns, a few
+# chunks ahead of the right edge of the screen, and a tick only loads a
+# finished chunk into the lanes when the screen reaches it. A chunk's
+# contents depend only on the world seed, its index, the game's settings
+# when it was requested, and where the previous chunk left off. So it can be
+# built on a background thread and still come out the same as when it is
+# built inline, and a replay reproduces it exactly.
+WORLD_CHUNK_WIDTH = 64
+WORLD_CHUNKS_AHEAD = 3  # Chunks kept requested ahead of the one the screen is entering
+STRUCTURE_MIN_GAP = 40  # Columns between structures
+_world_executor = None
+
+# A single background thread shared by all games, so chunks of one world are
+# built in order
+def world_executor():
+    global _world_executor
+    if _world_executor is None:
+        _world_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="world")
+    return _world_executor
+
+# Generated entities for world columns [start, start + WORLD_CHUNK_WIDTH).
+# `tail` holds where the next obstacle, structure and grass may go, so
+# spacing carries over into the following chunk.
+class WorldChunk:
+    __slots__ = ("index", "start", "obstacles", "structures", "grass", "tail")
+
+    def __init__(self, index, start, obstacles, structures, grass, tail):
+        self.index = index
+        self.start = start
+        self.obstacles = obstacles  # (x, y, kind)
+        self.structures = structures  # x
+        self.grass = grass  # (x, height, sprite)
+        self.tail = tail  # (next obstacle x, next structure x or None, next grass x, last structure x)
+
+# The game settings a chunk is generated with, taken when it is requested
+def world_params(state):
+    return (state.sh, state.sw, state.level_number, state.obstacle_speed, state.obstacle_gap, state.difficulty)
+
+# Columns from one spawn to the next, following the per-tick rule the game
+# used to apply at the right edge: each tick the ground moves `step` columns,
+# and a spawn happens once the distance passes `gap` (rolled again every
+# tick from gap..max_gap when max_gap is given) and a roll at `chance`
+# succeeds. By `limit` columns the last one has left the screen and the
+# next spawns at once.
+def spawn_distance(rng, step, chance, gap, max_gap=None, limit=None):
+    distance = 0
     while True:
-        key = stdscr.getch()
-        if key == ord("\n") or key == curses.KEY_ENTER:
+        distance += step
+        if limit is not None and distance >= limit:
+            return limit
+        min_distance = gap if max_gap is None else rng.randint(gap, max_gap)
+        if distance > min_distance and rng.random() < chance:
+            return distance
+
+def generate_chunk(seed, index, start, params, tail):
+    sh, sw, level_number, speed, obstacle_gap, difficulty = params
+    rng = random.Random(seed ^ index * 0x9E3779B97F4A7C15)
+    end = start + WORLD_CHUNK_WIDTH
+    step = max(1, int(speed))  # Columns the ground moves per tick
+    next_obstacle, next_structure, next_grass, last_structure = tail
+
+    # Every distance is a whole number of ticks of scrolling, so spawns land
+    # on the same columns relative to the screen as they did when they were
+    # made at the right edge each tick
+
+    # Structures (only on levels 2 and after). One appears at the latest
+    # when the previous one leaves the screen, as it did when spawning
+    # waited for an empty lane.
+    structures = []
+    nearby = [] if last_structure is None else [last_structure]  # Structures an obstacle must keep clear of
+    if level_number >= 2:
+        chance = difficulty.structure_chance
+        if level_number > 2:
+            chance = min(chance + difficulty.structure_chance_step * (level_number - 3), 1.0)
+        if next_structure is None:
+            next_structure = start + (sw - start) % step  # On the same column grid as the right edge
+        while next_structure < end:
+            structures.append(next_structure)
+            nearby.append(next_structure)
+            last_structure = next_structure
+            next_structure += spawn_distance(rng, step, chance, STRUCTURE_MIN_GAP, limit=sw)
+
+    # Obstacles, kept clear of structures, including the next chunk's first
+    # one. Several obstacles rolled for the same column never survived the
+    # spacing check, so one is placed per spawn.
+    if next_structure is not None:
+        nearby.append(next_structure)
+    obstacles = []
+    while next_obstacle < end:
+        x = next_obstacle
+        if not any(abs(x - structure_x) <= 2 for structure_x in nearby):
+            rand_value = rng.random()
+            if rand_value < difficulty.kind_2x2_below:
+                kind = KIND_2X2
+            elif rand_value < difficulty.kind_5x3_below:
+                kind = KIND_5X3
+            else:
+                kind = KIND_NEW
+            obstacles.append((x, rng.randint(2, sh - 5), kind))
+        next_obstacle = x + spawn_distance(rng, step, difficulty.obstacle_chance, obstacle_gap // 2,
+                                           int(obstacle_gap * 1.5), limit=sw)
+
+    # Grass along the ground
+    grass = []
+    while next_grass < end:
+        grass.append((next_grass, 2, rng.choice(GRASS_SPRITES)))
+        next_grass += spawn_distance(rng, step, 0.6, obstacle_gap * 0.25, limit=sw)
+
+    return WorldChunk(index, start, obstacles, structures, grass,
+                      (next_obstacle, next_structure, next_grass, last_structure))
+
+# Produces a game's chunks in order, inline or on the world thread
+class WorldGenerator:
+    def __init__(self, state, seed, executor=None):
+        self.seed = seed
+        self.executor = executor
+        self.loaded_until = state.sw - 6  # World column where the next chunk to load starts
+        self.next_index = 0  # Next chunk to request
+        self.next_start = self.loaded_until
+        self.requested = deque()  # Chunks, or futures of them, not loaded yet
+        # Where the last requested chunk left off, or its future on the world
+        # thread. Obstacles start at the right edge, grass 6 columns in.
+        self.tail = (state.sw - 1, None, self.next_start, None)
+        for _ in range(WORLD_CHUNKS_AHEAD):
+            self.request(world_params(state))
+
+    def request(self, params):
+        index, start = self.next_index, self.next_start
+        self.next_index += 1
+        self.next_start += WORLD_CHUNK_WIDTH
+        if self.executor is None:
+            chunk = generate_chunk(self.seed, index, start, params, self.tail)
+            self.tail = chunk.tail
+            self.requested.append(chunk)
+        else:
+            self.tail = self.executor.submit(self._generate_after, self.tail, index, start, params)
+            self.requested.append(self.tail)
+
+    # Runs on the world thread, which takes jobs in order, so the previous
+    # chunk is always finished by the time this one starts
+    def _generate_after(self, previous, index, start, params):
+        tail = previous.result().tail if isinstance(previous, Future) else previous
+        return generate_chunk(self.seed, index, start, params, tail)
+
+    # The next chunk, waiting for the world thread if it is not done yet
+    def next_chunk(self):
+        chunk = self.requested.popleft()
+        if isinstance(chunk, Future):
+            chunk = chunk.result()
+        self.loaded_until = chunk.start + WORLD_CHUNK_WIDTH
+        return chunk
+
+    # A generator that goes on from where this one is, building its chunks
+    # inline. Chunks are never changed once built, so both can share them.
+    def copy(self):
+        world = WorldGenerator.__new__(WorldGenerator)
+        world.__dict__.update(self.__dict__)
+        world.executor = None
+        world.requested = deque(chunk.result() if isinstance(chunk, Future) else chunk for chunk in self.requested)
+        if isinstance(self.tail, Future):
+            world.tail = self.tail.result().tail
+        return world
+
+# Load world chunks into the lanes as the right edge of the screen reaches them
+def spawn_entities(state):
+    world = state.world
+    right_edge = state.scroll + state.sw  # World column just past the right edge of the screen
+    while world.loaded_until <= right_edge:
+        chunk = world.next_chunk()
+        # Rows come from the current screen height, which may have changed
+        # since the chunk was generated
+        sh = state.sh
+        for x, y, kind in chunk.obstacles:
+            state.obstacles.add(state.obstacle_pool.acquire(x, min(y, sh - 5), kind))
+        for x in chunk.structures:
+            state.structures.add(state.structure_pool.acquire(x, sh - 6))  # Structures stand on the ground
+        for x, height, sprite in chunk.grass:
+            state.grass_structures.add(state.grass_pool.acquire(x, sh - 1, height, sprite))
+        world.request(world_params(state))
+
+# Scroll the parallax layers (stars and mountains)
+def move_background(state):
+    state.stars.scroll()
+
+    # Move mountains leftward (only if level is divisible by 3)
+    if state.level_number % 3 == 0:
+        state.mountains.scroll()
+
+# Cells the player may move against the world in one tick and still be
+# checked only where it ends up. Above this (a fast level, a long fall)
+# obstacles are hit-tested along the whole path and structures in sub-steps
+# no longer than this, since the smallest hit box is 2 cells.
+SWEEP_DISPLACEMENT = 2
+
+# When, as a fraction of the tick, the interval [a, a + a_size) moving by d
+# overlaps [b, b + b_size): (enter, leave), open at both ends, or None
+def sweep_interval(a, a_size, d, b, b_size):
+    if d == 0:
+        if a < b + b_size and a + a_size > b:
+            return -math.inf, math.inf
+        return None
+    t1 = (b - a - a_size) / d
+    t2 = (b + b_size - a) / d
+    return (t1, t2) if t1 < t2 else (t2, t1)
+
+# When, within the tick, a box moving by (dx, dy) overlaps a still box:
+# (time of impact, time they part), clipped to [0, 1], or None if they
+# never overlap. An overlap at the end of the tick counts, so this finds
+# everything the end-of-tick test finds.
+def sweep_aabb(x, y, width, height, dx, dy, bx, by, b_width, b_height):
+    span_x = sweep_interval(x, width, dx, bx, b_width)
+    if span_x is None:
+        return None
+    span_y = sweep_interval(y, height, dy, by, b_height)
+    if span_y is None:
+        return None
+    enter = max(span_x[0], span_y[0])
+    leave = min(span_x[1], span_y[1])
+    if enter < leave and enter < 1 and leave > 0:
+        return max(enter, 0.0), min(leave, 1.0)
+    return None
+
+# The first time in [enter, leave] that `sprite`, moving from (x, y) by
+# (dx, dy), touches the drawn cells of `other` at (bx, by), checking one
+# position per cell moved; None if it slips past through blank cells
+def first_contact(sprite, x, y, dx, dy, other, bx, by, enter, leave):
+    samples = max(1, math.ceil(max(abs(dx), abs(dy)) * (leave - enter)))
+    for i in range(samples + 1):
+        t = enter + (leave - enter) * i / samples
+        if masks_overlap(sprite, other, bx - round(x + dx * t), by - int(y + dy * t)):
+            return t
+    return None
+
+# Scroll obstacles, structures, and grass leftward and check for collisions.
+# Returns True if the player hit an obstacle.
+def move_entities(state):
+    speed = int(state.obstacle_speed)  # Ensure positions are always integers
+    state.scroll += speed
+    scroll = state.scroll
+    # The player's left edge in world columns
+    player_x = state.player_x + scroll
+    player_width = state.player_width
+    player_height = state.player_height
+    # How far the player moved against the world since the last check
+    start_x = state.last_player_x + scroll - speed
+    start_y = state.last_player_y
+    dx = player_x - start_x
+    dy = state.player_y - start_y
+    distance = max(abs(dx), abs(dy))
+
+    if distance <= SWEEP_DISPLACEMENT:
+        # Check for collisions with the obstacles that can overlap the player
+        for obs in state.obstacles.between(player_x - MAX_OBSTACLE_WIDTH, player_x + player_width):
+            obs_width, obs_height = OBSTACLE_SIZES[obs.kind]
+            if ((player_x < obs.x + obs_width and player_x + player_width > obs.x) and
+                (state.player_y < obs.y + obs_height and state.player_y + player_height > obs.y) and
+                masks_overlap(PLAYER_SPRITE, OBSTACLE_SPRITES[obs.kind], obs.x - player_x, obs.y - int(state.player_y))):
+                state.death_cause = OBSTACLE_DEATHS[obs.kind]
+                return True
+        resolve_structures(state, start_y)
+    else:
+        # Hit-test every obstacle the player swept past and take the first hit
+        first, hit = 1.0, None
+        lo, hi = min(start_x, player_x), max(start_x, player_x) + player_width
+        for obs in state.obstacles.between(lo - MAX_OBSTACLE_WIDTH, hi):
+            obs_width, obs_height = OBSTACLE_SIZES[obs.kind]
+            span = sweep_aabb(start_x, start_y, player_width, player_height, dx, dy,
+                              obs.x, obs.y, obs_width, obs_height)
+            if span is None or span[0] >= first:
+                continue
+            impact = first_contact(PLAYER_SPRITE, start_x, start_y, dx, dy,
+                                   OBSTACLE_SPRITES[obs.kind], obs.x, obs.y, *span)
+            if impact is not None and (hit is None or impact < first):
+                first, hit = impact, obs
+        if hit is not None:
+            state.player_y = start_y + dy * first  # Where the player met the obstacle
+            state.death_cause = OBSTACLE_DEATHS[hit.kind]
+            return True
+
+        # Structures push the player around, so walk the path in sub-steps
+        # when one is close enough to matter
+        if not state.structures.any_between(lo - STRUCTURE_WIDTH - 1, hi + 1):
+            steps = 0
+        else:
+            steps = math.ceil(distance / SWEEP_DISPLACEMENT)
+        end_x, end_y = state.player_x, state.player_y
+        x, y = state.last_player_x, start_y
+        for remaining in range(steps, 0, -1):
+            state.scroll = scroll - speed * (remaining - 1) // steps
+            state.player_x = next_x = x + (end_x - x) // remaining
+            state.player_y = next_y = y + (end_y - y) / remaining
+            resolve_structures(state, y)
+            x, y = state.player_x, state.player_y
+            if x != next_x:  # Pushed out of a structure
+                end_x = x
+            if y != next_y:  # Landed on one
+                end_y = y
+        state.scroll = scroll
+
+    state.last_player_x = state.player_x
+    state.last_player_y = state.player_y
+
+    # Drop everything that has scrolled off the left edge
+    state.obstacles.expire(scroll, state.obstacle_pool)
+    state.structures.expire(scroll, state.structure_pool)
+    state.grass_structures.expire(scroll, state.grass_pool)
+    return False
+
+STRUCTURE_WIDTH = 6
+STRUCTURE_HEIGHT = 5
+
+# Keep the player out of the structures near it: land it on top of one it
+# fell onto since it was at `prev_y`, and push it out sideways from one it
+# walked into
+def resolve_structures(state, prev_y):
+    scroll = state.scroll
+    player_x = state.player_x + scroll
+    player_width = state.player_width
+    player_height = state.player_height
+    structure_width = STRUCTURE_WIDTH
+    structure_height = STRUCTURE_HEIGHT
+    for structure in state.structures.between(player_x - structure_width - 1, player_x + player_width + 1):
+        structure_x = structure.x - scroll
+        structure_y = structure.y
+
+        # Land on top of the structure if the player's feet crossed its roof
+        # (or rest on it) this step
+        if (prev_y + player_height <= structure_y <= state.player_y + player_height and
+            state.player_x + player_width > structure_x and state.player_x < structure_x + structure_width):
+            state.player_y = structure_y - player_height
+            state.velocity = 0
+            state.is_jumping = False
+            continue
+
+        # Check for collisions with the structure
+        if ((state.player_x < structure_x + structure_width and state.player_x + player_width > structure_x) and
+            (state.player_y + player_height > structure_y and state.player_y < structure_y + structure_height)):
+            # Collision from the left or right of the structure
+            if state.player_x + player_width > structure_x and state.player_x < structure_x + structure_width // 2:  # Collision from the left
+                state.player_x = structure_x - player_width
+                state.move_right = False  # Prevent moving right through the structure
+            elif state.player_x < structure_x + structure_width and state.player_x > structure_x + structure_width // 2:  # Collision from the right
+                state.player_x = structure_x + structure_width
+                state.move_left = False  # Prevent moving left through the structure
+            state.velocity = 0  # Stop vertical movement
+            state.is_jumping = False
+
+# Pools and background for GameState.clone(). The pools never keep
+# anything, so every clone can share them.
+CLONE_POOLS = (EntityPool(Obstacle, reuse=False), EntityPool(Structure, reuse=False), EntityPool(Grass, reuse=False))
+NO_BACKGROUND = ParallaxLayer([], [], 0.0, 1, 1, min_x=0)
+
+# The autopilot plays by searching ahead over clones of the game: a beam
+# of the most promising lines of play, each decision held for a few ticks.
+# All lines at the same depth see the same world, so two that put the
+# player in the same place and motion have the same future, and only the
+# first is kept.
+AUTOPILOT_KEY = ord("p")
+AUTOPILOT_DEPTH = 10  # Decisions looked ahead
+AUTOPILOT_REPEAT = 3  # Ticks each decision is held for
+AUTOPILOT_BEAM = 8  # Lines of play kept at each depth
+AUTOPILOT_BUDGET = 0.6  # Share of a tick interval a search may take in play before it stops deepening
+AUTOPILOT_SIGHT = 12  # Columns ahead of the player weighed for risk
+# Action codes the search tries: hold, left, right, and each with a jump
+AUTOPILOT_ACTIONS = tuple(encode_inputs(keys) for keys in (
+    (HOLD_KEYS[0],), (ord("a"),), (ord("d"),),
+    (JUMP_KEYS[0], HOLD_KEYS[0]), (JUMP_KEYS[0], ord("a")), (JUMP_KEYS[0], ord("d"))))
+AUTOPILOT_GROUND_MOVES = AUTOPILOT_ACTIONS[:3]  # A jump in mid-air does nothing
+
+# How dangerous a position looks, for ranking lines that all survive the
+# lookahead: obstacles just ahead in the player's rows, nearer ones counting
+# for more, and a little for straying from the starting column
+def autopilot_risk(state, home_x):
+    player_x = state.player_x + state.scroll
+    top = state.player_y - 1
+    bottom = state.player_y + state.player_height + 1
+    risk = abs(state.player_x - home_x) * 0.05
+    for obs in state.obstacles.between(player_x - MAX_OBSTACLE_WIDTH, player_x + AUTOPILOT_SIGHT):
+        if obs.y < bottom and obs.y + OBSTACLE_SIZES[obs.kind][1] > top:
+            risk += 1 / (1 + max(obs.x - player_x, 0))
+    return risk
+
+# The action code to play next from `state`: the first decision of the
+# safest line found. If every line dies, the one that lasted longest. With
+# a `deadline` (a time.perf_counter() value) the search ends early when it
+# passes, so its result also depends on how fast the machine is.
+def plan_autopilot(state, depth=AUTOPILOT_DEPTH, repeat=AUTOPILOT_REPEAT, beam_width=AUTOPILOT_BEAM,
+                   deadline=None):
+    home_x = state.sw // 6
+    beam = [(state.clone(), AUTOPILOT_ACTIONS[0])]
+    for level in range(depth):
+        if deadline is not None and level and time.perf_counter() > deadline:
+            break
+        seen = set()
+        children = []
+        for node, first in beam:
+            actions = AUTOPILOT_GROUND_MOVES if node.is_jumping else AUTOPILOT_ACTIONS
+            last = len(actions) - 1
+            for i, code in enumerate(actions):
+                child = node.clone() if i < last else node  # The node itself is not needed after its last child
+                keys = ACTION_KEYS[code]
+                for _ in range(repeat):
+                    if step(child, keys) == LIFE_LOST:
+                        break
+                else:
+                    position = (child.player_x, child.player_y, child.velocity, child.is_jumping)
+                    if position not in seen:
+                        seen.add(position)
+                        children.append((autopilot_risk(child, home_x), len(children), child,
+                                         code if level == 0 else first))
+        if not children:
             break
+        children.sort()
+        beam = [(child, first) for _, _, child, first in children[:beam_width]]
+    return beam[0][1]
+
+# Plays for the player while switched on by AUTOPILOT_KEY. Each planned
+# decision is played for AUTOPILOT_REPEAT ticks, as it was in the search,
+# so every tick played is one the search has already simulated. With a
+# `budget` in seconds, each search stops deepening once it is used up.
+class Autopilot:
+    def __init__(self, on=False, budget=None):
+        self.on = on
+        self.budget = budget
+        self.key_down = False  # Whether the toggle key was among the last tick's keys
+        self.plan = None  # (state, tick the decision runs out, screen size, action code)
+
+    # The action code for one tick, from the keys pressed during it
+    def code(self, state, keys):
+        down = AUTOPILOT_KEY in keys
+        if down and not self.key_down:
+            self.on = not self.on
+        self.key_down = down
+        if not self.on:
+            self.plan = None
+            return encode_inputs(keys)
+        plan = self.plan
+        if plan is None or plan[0] is not state or state.ticks >= plan[1] or plan[2] != (state.sh, state.sw):
+            deadline = time.perf_counter() + self.budget if self.budget is not None else None
+            plan = self.plan = (state, state.ticks + AUTOPILOT_REPEAT, (state.sh, state.sw),
+                                plan_autopilot(state, deadline=deadline))
+        return plan[3]
+
+# Rough cost of the cursor-addressing sequence curses emits before each run
+CURSOR_MOVE_BYTES = 8
+# Unchanged cells shorter than this between two changes are rewritten rather
+# than jumped over, since a cursor move costs more than a few characters
+RUN_MERGE_GAP = 4
+DIFF_CHUNK = 16  # Cells compared at once when looking for changes in a row
+
+# Off-screen character grid for one window. Frames are drawn into it with the
+# same addstr(y, x, text) calls as a curses window, then flush() compares
+# them with what is already on the terminal and writes only changed cells.
+class FrameBuffer:
+    def __init__(self, sh, sw):
+        self.sh = sh
+        self.sw = sw
+        # Blank frame with the window border, copied at the start of each frame
+        self.base = [[" "] * sw for _ in range(sh)]
+        for x in range(sw):
+            self.base[0][x] = self.base[sh - 1][x] = "─"
+        for y in range(sh):
+            self.base[y][0] = self.base[y][sw - 1] = "│"
+        self.base[0][0], self.base[0][sw - 1] = "┌", "┐"
+        self.base[sh - 1][0], self.base[sh - 1][sw - 1] = "└", "┘"
+        self.base_codes = new_codes([ord(ch) for row in self.base for ch in row])
+        self._background = new_codes(self.base_codes)
+        self.cells = [row[:] for row in self.base]
+        self.shown = None  # Rows as last written to the terminal
+        self.invalidate()
+
+        # Output statistics
+        self.frames = 0
+        self.bytes_last_frame = 0  # Estimated bytes sent for the last frame
+        self.bytes_full_frame = 0  # What a full repaint of the last frame would cost
+        self.bytes_total = 0
+
+    def getmaxyx(self):
+        return self.sh, self.sw
+
+    # Forget what is on the terminal so the next flush repaints every cell
+    def invalidate(self):
+        self.shown = [None] * self.sh
+
+    # The blank, bordered frame as a codepoint buffer, for background layers
+    # to rasterize into before begin(). The buffer is reused every frame.
+    def new_background(self):
+        if np is not None:
+            np.copyto(self._background, self.base_codes)
+        else:
+            self._background[:] = self.base_codes
+        return self._background
+
+    # Start a new frame from the blank, bordered frame or from a background
+    # made by new_background()
+    def begin(self, background=None):
+        cells = self.cells
+        if background is None:
+            for y, row in enumerate(self.base):
+                cells[y][:] = row
+            return
+        text = background.tobytes().decode(CODE_ENCODING)
+        sw = self.sw
+        for y in range(self.sh):
+            cells[y][:] = text[y * sw:(y + 1) * sw]
+
+    # Draw text at (y, x), clipped to the window
+    def addstr(self, y, x, text):
+        if not 0 <= y < self.sh:
+            return
+        row = self.cells[y]
+        if x < 0:
+            text = text[-x:]
+            x = 0
+        end = min(self.sw, x + len(text))
+        if end > x:
+            row[x:end] = text[:end - x]
+
+    # Draw a pre-rendered sprite with its top-left corner at (x, y)
+    def blit(self, sprite, x, y):
+        x = int(x)
+        for dy, dx, cells, text in sprite.clipped(x, self.sw):
+            if 0 <= y + dy < self.sh:
+                start = x + dx
+                self.cells[y + dy][start:start + len(cells)] = cells
+
+    # Write the changed cells to the curses window and update the terminal
+    def flush(self, w):
+        written = self.write(w)
+        w.noutrefresh()
+        curses.doupdate()
+        return written
+
+    # Send the changed cells to w without refreshing the terminal
+    def write(self, w):
+        written = 0
+        full = 0
+        for y in range(self.sh):
+            row = self.cells[y]
+            full += len("".join(row).encode()) + CURSOR_MOVE_BYTES
+            old = self.shown[y]
+            if row == old:
+                continue
+            self.shown[y] = row[:]
+            if old is None:
+                runs = [(0, self.sw)]
+            else:
+                runs = changed_runs(row, old)
+            for start, end in runs:
+                if row[start] == "" and start > 0:
+                    start -= 1  # Rewrite the whole of a wide character
+                text = "".join(row[start:end])
+                written += len(text.encode()) + CURSOR_MOVE_BYTES
+                try:
+                    w.addstr(y, start, text)
+                except curses.error:
+                    pass  # Writing the bottom-right cell moves the cursor off the window
+
+        self.frames += 1
+        self.bytes_last_frame = written
+        self.bytes_full_frame = full
+        self.bytes_total += written
+        return written
+
+# Spans [start, end) where two rows of cells differ; runs separated by
+# fewer than RUN_MERGE_GAP unchanged cells are merged into one write.
+# Rows are compared a chunk at a time so unchanged stretches cost one
+# slice comparison instead of a Python-level test per cell.
+def changed_runs(new, old):
+    runs = []
+    diffs = []
+    width = len(new)
+    for i in range(0, width, DIFF_CHUNK):
+        j = i + DIFF_CHUNK
+        if new[i:j] != old[i:j]:
+            diffs += [k for k in range(i, min(j, width)) if new[k] != old[k]]
+    if not diffs:
+        return runs
+    start = end = diffs[0]
+    for i in diffs[1:]:
+        if i - end > RUN_MERGE_GAP:
+            runs.append((start, end + 1))
+            start = i
+        end = i
+    runs.append((start, end + 1))
+    return runs
+
+# How far left, up to shift_max columns, the cells of `old` moved to give
+# `target`: the shift leaving the fewest cells different, counted at C
+# speed. 0 unless that count plus the bytes of the shift itself comes
+# under `changed`, the cells different with no shift.
+def guess_shift(target, old, changed, shift_max):
+    best, fewest = 0, changed - CURSOR_MOVE_BYTES - 4
+    tail = target[1:]
+    for shift in range(1, shift_max + 1):
+        different = sum(map(operator.ne, tail, old[1 + shift:])) + shift
+        if different < fewest:
+            best, fewest = shift, different
+    return best
+
+# Output backends take a finished FrameBuffer to the terminal in two
+# steps, stage() and send(), so the profiler can time them apart;
+# present() does both. release() is called before curses draws a full
+# screen of its own over the game.
+
+# Changed runs go through the curses window and curses picks the bytes
+class CursesOutput:
+    def __init__(self, w):
+        self.w = w
+
+    def stage(self, buf):
+        return buf.write(self.w)
+
+    def send(self):
+        self.w.noutrefresh()
+        curses.doupdate()
+
+    def present(self, buf):
+        written = self.stage(buf)
+        self.send()
+        return written
+
+    def release(self):
+        pass
 
-def draw_structure(stdscr, x, y):
-    structure = [
-        "  /\  ",
-        " /  \\",
-        "/____\\",
-        "| [] |",
-        "|____|"
-    ]
-    for i, line in enumerate(structure):
-        stdscr.addstr(y + i, x, line)
-
-def draw_grass(stdscr, x, y):
-    grass_type = random.choice([
-        ('⠀⠀⣴⣄⠀⢰⡏⣸⠀⣴⠏', '⠀⢠⣿⠙⣦⡟⢠⣿⣿⢏⡀'),
-        ('⠀⠀⠀⠀⣿⣇⠀⠀⢠⣧⠀⠀⢀⣀', '⠰⣶⣀⠀⠀⣿⢿⡄⣸⡿⣿⣤⡶⣿⠏'),
-        ('⠀⠀⠀⠀⠀⠀⠀⠀⠀⣰⣇⠀⣀⠀⠀⢀⣴⡶⣩⠿⠋⠁', '⠀⠀⠠⢤⣤⣄⡀⠀⢀⡿⣿⣼⣻⢁⣴⠟⢥⣿⠟⠁⠀⠀'),
-        ('⠀⠀  ⠀⣰⠇       ', '⣄⠀⢠⣾⡏⢀⣠⣾⠆')
-    ])
-    for i, line in enumerate(grass_type):
-        stdscr.addstr(y - 1 + i, x, line)
-
-def draw_mountains(stdscr, x, y):
-    mountain = [
-        "    .                  .-.    .  _   *     _   .",
-        "           *          /   \     ((       _/ \       *    .",
-        "         _    .   .--'/\_ \     `      /    \  *    ___",
-        "     *  / \_    _/ ^      ' __        /\/\  /\  __/   \ *",
-        "       /    \  /    .'   _/  /  \  *' /    \/  \/ .`'\_/\   .",
-        "  .   /\/\  /\/ :' __  ^/  ^/    `--./.'  ^  `-.\ _    _:\ _",
-        "     /    \/  \  _/  \-' __/.' ^ _   \_   .'\   _/ \ .  __/",
-        "   /\  .-   `. \/     \ / -.   _/ \ -. `_/   \ /    `._/  ^  ",
-        "  /  `-.__ ^   / .-'.--'    . /    `--./ .-'  `-.  `-. `.  -  `.",
-        "@/        `.  / /      `-.   /  .-'   / .   .'   \    \  \  .-  \%"
-    ]
-    for i, line in enumerate(mountain):
-        if 0 <= y + i < stdscr.getmaxyx()[0]:  # Ensure within screen bounds
+# Escape sequences for the ANSI encoder (1-based rows and columns)
+ANSI_AUTOWRAP_OFF = "\x1b[?7l"  # So writing the last column never scrolls
+ANSI_AUTOWRAP_ON = "\x1b[?7h"
+ANSI_SHIFT_MAX = 3  # Widest left shift of a row tried with delete-character
+ANSI_SHIFT_MIN_BYTES = 24  # Only rows costing more than this to patch try a shift
+ANSI_BURST_SECONDS = 0.25  # Bandwidth a capped stream may save up for a burst
+BACKGROUND_CELLS = frozenset((" ", chr(STAR_CODE)))  # Cells a capped frame may leave stale
+
+# Shortest escape sequence moving the cursor from `cursor` ((y, x), or None
+# if unknown) to (y, x)
+def cursor_move(cursor, y, x):
+    best = f"\x1b[{y + 1};{x + 1}H" if (y, x) != (0, 0) else "\x1b[H"
+    if cursor is None:
+        return best
+    cy, cx = cursor
+    if (cy, cx) == (y, x):
+        return ""
+    options = []
+    if cy == y:
+        if x > cx:
+            options.append("\x1b[C" if x - cx == 1 else f"\x1b[{x - cx}C")
+        elif x == 0:
+            options.append("\r")
+        else:
+            options.append("\x1b[D" if cx - x == 1 else f"\x1b[{cx - x}D")
+        options.append(f"\x1b[{x + 1}G")
+    elif cx == x:
+        options.append(f"\x1b[{y + 1}d")
+        if y > cy:
+            options.append("\x1b[B" if y - cy == 1 else f"\x1b[{y - cy}B")
+    for option in options:
+        if len(option) < len(best):
+            best = option
+    return best
+
+# Encodes FrameBuffer changes as raw ANSI bytes, for remote terminals and
+# the telnet server. Compared with going through curses it
+#  - picks the shortest cursor movement for each run, relative when it can;
+#  - shifts a row left with delete-character (DCH) when a layer scrolled,
+#    then patches what the shift got wrong, if that is cheaper;
+#  - under a bandwidth cap, leaves stars stale rather than delaying a frame.
+# Static cells (the border and unchanged HUD text) never differ from what
+# is shown, so they are never resent.
+class AnsiOutput:
+    def __init__(self, stream=None, max_bytes_per_sec=None, clock=time.monotonic, window=None,
+                 shift_max=ANSI_SHIFT_MAX):
+        self.stream = stream  # Binary stream for send(), or None to only encode
+        self.window = window  # Curses window sharing the terminal, if any
+        self.max_bytes_per_sec = max_bytes_per_sec
+        self.shift_max = shift_max  # Widest row shift tried; 0 turns shifting off
+        self.clock = clock
+        self.allowance = (max_bytes_per_sec or 0) * ANSI_BURST_SECONDS
+        self.last_time = None
+        self.cursor = None  # Where the terminal's cursor is, if known
+        self.started = False
+        self.pending = b""
+        self.degraded_frames = 0  # Frames that left background cells stale
+        self.rows_shifted = 0
+
+    # Bytes the next frame may use under the cap, or None if uncapped
+    def budget(self):
+        if not self.max_bytes_per_sec:
+            return None
+        now = self.clock()
+        if self.last_time is not None:
+            self.allowance = min(self.allowance + (now - self.last_time) * self.max_bytes_per_sec,
+                                 self.max_bytes_per_sec * ANSI_BURST_SECONDS)
+        self.last_time = now
+        return max(self.allowance, 0)
+
+    # The bytes that bring the terminal from buf.shown to buf.cells
+    def encode(self, buf):
+        budget = self.budget()
+        data, rows, cursor, shifted = self.encode_rows(buf, False)
+        if budget is not None and len(data) > budget:
+            lossy = self.encode_rows(buf, True)
+            if len(lossy[0]) < len(data):
+                data, rows, cursor, shifted = lossy
+                self.degraded_frames += 1
+        self.rows_shifted += shifted
+        for y, row in rows.items():
+            buf.shown[y] = row
+        self.cursor = cursor
+        if not self.started:
+            data = ANSI_AUTOWRAP_OFF.encode() + data
+            self.started = True
+        if self.max_bytes_per_sec:
+            self.allowance -= len(data)  # May go negative; later frames pay it back
+
+        buf.frames += 1
+        buf.bytes_last_frame = len(data)
+        buf.bytes_full_frame = sum(len("".join(row).encode()) + CURSOR_MOVE_BYTES for row in buf.cells)
+        buf.bytes_total += len(data)
+        return data
+
+    # Encode every changed row. With lossy set, cells that are background on
+    # both the terminal and the new frame count as unchanged. Returns the
+    # bytes, the rows as they will be shown, the final cursor position, and
+    # how many rows were shifted.
+    def encode_rows(self, buf, lossy):
+        parts = []
+        rows = {}
+        cursor = self.cursor
+        shifted = 0
+        sw = buf.sw
+        for y in range(buf.sh):
+            target = buf.cells[y]
+            old = buf.shown[y]
+            if target == old:
+                continue
+            shift = 0
+            if old is None:
+                runs = [(0, sw)]
+            else:
+                if lossy:
+                    target = [o if n in BACKGROUND_CELLS and o in BACKGROUND_CELLS else n
+                              for n, o in zip(target, old)]
+                    if target == old:
+                        continue
+                shift, runs = self.plan_row(target, old)
+                if shift:
+                    parts.append(cursor_move(cursor, y, 1) + f"\x1b[{shift}P")
+                    cursor = (y, 1)
+                    shifted += 1
+            for start, end in runs:
+                if target[start] == "" and start > 0:
+                    start -= 1  # Rewrite the whole of a wide character
+                parts.append(cursor_move(cursor, y, start))
+                parts.append("".join(target[start:end]))
+                cursor = (y, end) if end < sw else None
+            rows[y] = target[:]
+        return "".join(parts).encode(), rows, cursor, shifted
+
+    # Choose between patching a row in place and first shifting it left by
+    # up to shift_max columns, judged by counts of differing cells so the
+    # row is only worked into runs once, for the plan chosen. Returns
+    # (shift, runs to write).
+    def plan_row(self, target, old):
+        if not self.shift_max or "" in old or "" in target:
+            return 0, changed_runs(target, old)
+        changed = sum(map(operator.ne, target, old))
+        if changed + CURSOR_MOVE_BYTES <= ANSI_SHIFT_MIN_BYTES:
+            return 0, changed_runs(target, old)
+        shift = guess_shift(target, old, changed, self.shift_max)
+        if not shift:
+            return 0, changed_runs(target, old)
+        # DCH at column 1 keeps the left border and pulls in blanks at the right
+        return shift, changed_runs(target, old[:1] + old[1 + shift:] + [" "] * shift)
+
+    def stage(self, buf):
+        self.pending = self.encode(buf)
+        return len(self.pending)
+
+    def send(self):
+        if self.pending:
+            self.stream.write(self.pending)
+            self.pending = b""
+        self.stream.flush()
+
+    def present(self, buf):
+        written = self.stage(buf)
+        self.send()
+        return written
+
+    # Hand the terminal back: autowrap on, cursor position unknown, and curses
+    # told that the screen no longer matches what it last drew
+    def release(self):
+        if self.started and self.stream is not None:
+            self.stream.write(ANSI_AUTOWRAP_ON.encode())
+            self.stream.flush()
+        self.started = False
+        self.cursor = None
+        if self.window is not None:
+            self.window.clearok(True)
+
+# Draw the current game state into a FrameBuffer
+def render(buf, state, show_frame_stats=False, perf_hud=None, quality=None):
+    sh, sw = state.sh, state.sw
+    star_fraction, show_mountains, show_grass, _ = quality or QUALITY_LEVELS[0]
+
+    # Render stars straight into the background
+    background = buf.new_background()
+    state.stars.rasterize(background, count=int(len(state.stars) * star_fraction))
+    buf.begin(background)
+
+    # Render mountains (only if level is divisible by 3)
+    if show_mountains and state.level_number % 3 == 0:
+        mountain_sprite = SPRITES["mountain"]
+        for x, y in state.mountains.positions():
+            buf.blit(mountain_sprite, x, int(y))
+
+    # Render grass structures (before obstacles and player)
+    scroll = state.scroll
+    if show_grass:
+        for grass in state.grass_structures:
+            if 0 <= grass.x - scroll < sw:
+                buf.blit(grass.sprite, grass.x - scroll, grass.y - 1)
+
+    # Render structures
+    structure_sprite = SPRITES["structure"]
+    for structure in state.structures:
+        buf.blit(structure_sprite, structure.x - scroll, structure.y)
+
+    # Render obstacles
+    for obs in state.obstacles:
+        sprite = OBSTACLE_SPRITES[obs.kind]
+        if 0 <= obs.y < sh - sprite.height:  # Ensure obstacle fits on screen
+            buf.blit(sprite, obs.x - scroll, obs.y)
+
+    # Render player (after obstacles and grass to be in front)
+    if 0 <= state.player_y < sh - state.player_height:
+        buf.blit(SPRITES["player"], state.player_x, int(state.player_y))
+
+    # Render score, high score, level and extra lives
+    buf.addstr(0, sw // 2 - 5, f"Score: {state.score}")
+    buf.addstr(0, sw - 20, f"High Score: {state.high_score}")
+    buf.addstr(0, 2, f"Level: {state.level_number}")
+    extra_lives_display = " ".join(["<3"] * (state.lives - 1))
+    buf.addstr(1, sw // 2 - 10, f"Extra lives: {extra_lives_display}")
+    if perf_hud:
+        buf.addstr(1, 2, perf_hud[:sw // 2 - 13])  # Left of the lives display
+
+    # Bytes sent for the previous frame against a full repaint
+    if show_frame_stats:
+        buf.addstr(sh - 2, 2, f"Output: {buf.bytes_last_frame} B/frame (full repaint {buf.bytes_full_frame} B)")
+
+# Display the Level Up screen and wait for Enter
+def show_level_up(w, level_number):
+    banner = get_banner(LEVEL_UP_BANNER)
+    banner.text(5, -10, f"Level {level_number} - Press Enter to continue")
+    banner.show(w)
+    if wait_for_enter(w, banner):
+        curses.ungetch(curses.KEY_RESIZE)  # Let the game loop adopt the new size
+
+# Replay files: a header, then records. An action code byte is followed by
+# a varint count of consecutive ticks with that code, so held or idle input
+# costs two bytes per change rather than one per tick. A terminal resize is
+# recorded between ticks, since it moves entities. Each life ends with a
+# LIFE_END record holding its tick count, score and level, which a replay
+# checks to prove it stayed in sync.
+REPLAY_MAGIC = b"ASRP"
+REPLAY_VERSION = 5  # 2: world generated in chunks; 3: swept collisions; 4: cell-exact hits;
+                    # 5: obstacles kept clear of structures across chunk edges
+REPLAY_HEADER = struct.Struct("<4sBQHHBI")  # magic, version, seed, height, width, lives, stars
+REPLAY_RESIZE = 0xFD  # Followed by varint height and width
+REPLAY_LIFE_END = 0xFE
+REPLAY_GAME_END = 0xFF
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+# Writes one game's seed and per-tick action codes to a replay file
+class ReplayRecorder:
+    def __init__(self, path, seed, sh, sw, lives, max_stars):
+        self.file = open(path, "wb")
+        self.file.write(REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, seed, sh, sw, lives, max_stars))
+        self.size = (sh, sw)  # Screen size as of the last record
+        self.code = None  # Action code of the current run
+        self.run = 0  # Ticks in the current run
+
+    def record(self, code):
+        if code == self.code:
+            self.run += 1
+            return
+        self._end_run()
+        self.code = code
+        self.run = 1
+
+    def _end_run(self):
+        if self.run:
+            out = bytearray([self.code])
+            write_varint(out, self.run)
+            self.file.write(out)
+        self.code = None
+        self.run = 0
+
+    def record_resize(self, sh, sw):
+        self._end_run()
+        self.size = (sh, sw)
+        out = bytearray([REPLAY_RESIZE])
+        write_varint(out, sh)
+        write_varint(out, sw)
+        self.file.write(out)
+
+    # Mark the end of a life and flush, so a crash loses at most one life
+    def end_life(self, state):
+        self._end_run()
+        out = bytearray([REPLAY_LIFE_END])
+        for value in (state.ticks, state.score, state.level_number):
+            write_varint(out, value)
+        self.file.write(out)
+        self.file.flush()
+
+    def close(self):
+        self._end_run()
+        self.file.write(bytes([REPLAY_GAME_END]))
+        self.file.close()
+
+# Parse a replay file into its header and a list of records:
+# (code, ticks), (REPLAY_RESIZE, height, width), (REPLAY_LIFE_END, ticks,
+# score, level) or (REPLAY_GAME_END,)
+def read_replay(path):
+    with open(path, "rb") as file:
+        data = file.read()
+    magic, version, seed, sh, sw, lives, max_stars = REPLAY_HEADER.unpack_from(data)
+    if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+        raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay")
+    header = {"seed": seed, "sh": sh, "sw": sw, "lives": lives, "stars": max_stars}
+    records = []
+    pos = REPLAY_HEADER.size
+    while pos < len(data):
+        kind = data[pos]
+        pos += 1
+        if kind == REPLAY_GAME_END:
+            records.append((kind,))
+            break
+        if kind == REPLAY_LIFE_END:
+            ticks, pos = read_varint(data, pos)
+            score, pos = read_varint(data, pos)
+            level, pos = read_varint(data, pos)
+            records.append((kind, ticks, score, level))
+        elif kind == REPLAY_RESIZE:
+            sh, pos = read_varint(data, pos)
+            sw, pos = read_varint(data, pos)
+            records.append((kind, sh, sw))
+        else:
+            run, pos = read_varint(data, pos)
+            records.append((kind, run))
+    return header, records
+
+# Seeds for each life of a game, derived from the game's seed
+def life_seeds(seed):
+    rng = random.Random(seed)
+    while True:
+        yield rng.getrandbits(63)
+
+# Re-run a recorded game without curses. on_tick(state, event) is called
+# after every tick and may return False to stop. Returns the (ticks, score,
+# level) of each life played and whether they all matched the recording.
+def replay_game(path, on_tick=None):
+    header, records = read_replay(path)
+    seeds = life_seeds(header["seed"])
+    lives = header["lives"]
+    sh, sw = header["sh"], header["sw"]
+    carry = (0, 1.0, 0, 1)  # Score, speed multiplier, high score and level
+    life_seed = next(seeds)
+    state = None  # Each life starts at its first tick, at the size in effect then
+    played = []
+    life_over = False
+    for record in records:
+        if record[0] == REPLAY_GAME_END:
+            break
+        if record[0] == REPLAY_RESIZE:
+            _, sh, sw = record
+            if state is not None and state.ticks:
+                state.resize(sh, sw)
+            else:
+                state = None
+            continue
+        if record[0] == REPLAY_LIFE_END:
+            if state is None:
+                return played, False
+            outcome = (state.ticks, state.score, state.level_number)
+            played.append(outcome)
+            if not life_over or outcome != record[1:]:
+                return played, False
+            lives -= 1
+            carry = state.result()[1:]
+            life_seed = next(seeds)
+            state = None
+            life_over = False
+            continue
+        code, run = record
+        keys = ACTION_KEYS[code]
+        if state is None:
+            state = GameState(sh, sw, lives, *carry, header["stars"], life_seed)
+        for _ in range(run):
+            if life_over:
+                return played, False  # The recording kept going after this life ended
+            event = step(state, keys)
+            life_over = event == LIFE_LOST
+            if on_tick is not None and on_tick(state, event) is False:
+                return played, True
+    return played, True
+
+# Replay a game as fast as possible and print how each life ended
+def print_replay(path):
+    played, in_sync = replay_game(path)
+    for life, (ticks, score, level) in enumerate(played, 1):
+        print(f"life {life}: {ticks} ticks, score {score}, level {level}")
+    print("replay matches the recording" if in_sync else "replay DIVERGED from the recording")
+    return in_sync
+
+# Show a recorded game at `options.speed` times the tick rate; Q stops it
+def replay_main(stdscr, options):
+    curses.curs_set(0)
+    header, _ = read_replay(options.replay)
+    max_h, max_w = stdscr.getmaxyx()
+    w = curses.newwin(min(header["sh"], max_h), min(header["sw"], max_w), 0, 0)
+    buf = FrameBuffer(header["sh"], header["sw"])
+    scheduler = FrameScheduler(options.tick_rate * options.speed)
+    backlog = 0  # Ticks due before the next frame is drawn
+
+    def on_tick(state, event):
+        nonlocal backlog, buf
+        if (state.sh, state.sw) != (buf.sh, buf.sw):  # The recording was resized
+            buf = FrameBuffer(state.sh, state.sw)
+            w.clear()
+        while not backlog:
+            w.timeout(scheduler.timeout_ms())
+            if w.getch() in (ord("q"), ord("Q")):
+                return False
+            backlog = scheduler.due_ticks()
+        backlog -= 1
+        if not backlog:  # Skip drawing the ticks we are catching up on
+            render(buf, state, options.frame_stats)
+            buf.flush(w)
+        return True
+
+    _, in_sync = replay_game(options.replay, on_tick)
+    try:
+        w.addstr(1, 2, "Replay matches the recording" if in_sync else "Replay DIVERGED from the recording")
+        w.addstr(2, 2, "Press Enter to exit")
+    except curses.error:
+        pass
+    w.refresh()
+    wait_for_enter(w)
+
+# Fixed-rate tick scheduler on a monotonic clock. The driver sleeps until
+# time_until_next() runs out (or a key arrives), then runs due_ticks() steps.
+class FrameScheduler:
+    def __init__(self, tick_rate=TICK_RATE, max_catch_up=MAX_CATCH_UP_TICKS, clock=time.monotonic):
+        self.interval = 1.0 / tick_rate
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.late_ticks = 0  # Ticks that ran after their deadline had passed
+        self.dropped_ticks = 0  # Ticks skipped because we fell too far behind
+        self.reset()
+
+    # Restart the schedule from now, e.g. after a pause screen
+    def reset(self):
+        self.next_tick = self.clock() + self.interval
+
+    # Seconds until the next tick is due (0 if it is already due)
+    def time_until_next(self):
+        return max(0.0, self.next_tick - self.clock())
+
+    # Milliseconds to block for input before the next tick, for window.timeout()
+    def timeout_ms(self):
+        return math.ceil(self.time_until_next() * 1000)
+
+    # Number of ticks to run now. Late ticks are caught up back-to-back, up
+    # to max_catch_up; beyond that the schedule resyncs and the rest are dropped.
+    def due_ticks(self):
+        now = self.clock()
+        if now < self.next_tick:
+            return 0
+        due = int((now - self.next_tick) // self.interval) + 1
+        self.late_ticks += due - 1
+        if due > self.max_catch_up:
+            self.dropped_ticks += due - self.max_catch_up
+            due = self.max_catch_up
+            self.next_tick = now + self.interval
+        else:
+            self.next_tick += due * self.interval
+        return due
+
+# Copy of everything render() reads from a GameState, taken after a tick
+# so the renderer never touches the live state. `time` is when it was taken.
+class FrameSnapshot:
+    def __init__(self, state, time):
+        self.time = time
+        self.sh, self.sw = state.sh, state.sw
+        self.lives = state.lives
+        self.score = state.score
+        self.high_score = state.high_score
+        self.level_number = state.level_number
+        self.player_x, self.player_y = state.player_x, state.player_y
+        self.player_height = state.player_height
+        self.scroll = state.scroll
+        self.stars = state.stars.copy()
+        self.mountains = state.mountains.copy()
+        # Fresh entities, since the pools reuse the live ones
+        self.obstacles = [Obstacle(obs.x, obs.y, obs.kind) for obs in state.obstacles]
+        self.structures = [Structure(structure.x, structure.y) for structure in state.structures]
+        self.grass_structures = [Grass(grass.x, grass.y, grass.height, grass.sprite)
+                                 for grass in state.grass_structures]
+
+# The frame `alpha` (0 to 1) of the way from `prev` to `frame`, for drawing
+# between ticks. Entities stay where `frame` has them in the world and the
+# scroll position is blended; the player and background layers are moved
+# back along their last step.
+def interpolate_frame(prev, frame, alpha):
+    if prev is None or alpha >= 1 or (prev.sh, prev.sw, prev.level_number) != (frame.sh, frame.sw, frame.level_number):
+        return frame
+    back = 1 - alpha
+    view = copy.copy(frame)
+    view.scroll = frame.scroll - round((frame.scroll - prev.scroll) * back)
+    view.player_x = frame.player_x - round((frame.player_x - prev.player_x) * back)
+    view.player_y = frame.player_y - (frame.player_y - prev.player_y) * back
+    view.stars = frame.stars.copy(frame.stars.speed * back)
+    if frame.level_number % 3 == 0:
+        view.mountains = frame.mountains.copy(frame.mountains.speed * back)
+    return view
+
+# Runs the simulation on its own thread at a fixed tick rate, so a slow
+# terminal costs the renderer frames instead of slowing the game down.
+# After each batch of ticks it publishes a FrameSnapshot: `frames` holds
+# the previous and the latest snapshot and is replaced as a whole, so the
+# renderer always reads a consistent pair. The thread stops by itself when
+# a tick ends the life or the level, and is stopped around resizes.
+class SimulationThread:
+    def __init__(self, state, keys, scheduler, recorder=None, profiler=None, autopilot=None):
+        self.state = state
+        self.keys = keys
+        self.autopilot = autopilot or Autopilot()
+        self.scheduler = scheduler
+        self.recorder = recorder
+        self.profiler = profiler
+        self.frames = (None, None)
+        self.event = None  # LEVEL_UP or LIFE_LOST once the thread has stopped for it
+        self.error = None  # An exception raised by a tick
+        self.done = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.frames = (None, FrameSnapshot(self.state, self.scheduler.clock()))
+        self.event = self.error = None
+        self.done.clear()
+        self._stop.clear()
+        self.scheduler.reset()
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        state, scheduler, profiler = self.state, self.scheduler, self.profiler
+        try:
+            while not self._stop.wait(scheduler.time_until_next()):
+                ticks = scheduler.due_ticks()
+                if not ticks:
+                    continue
+                if profiler is not None:
+                    profiler.count_ticks(scheduler)
+                event = None
+                for _ in range(ticks):
+                    code = self.autopilot.code(state, self.keys.snapshot())
+                    if self.recorder is not None:
+                        self.recorder.record(code)
+                    if profiler is None:
+                        event = step(state, ACTION_KEYS[code], scheduler.interval)
+                    else:
+                        tick_start = profiler.clock()
+                        event = step(state, ACTION_KEYS[code], scheduler.interval)
+                        profiler.phases["tick"].add(profiler.clock() - tick_start)
+                    if event is not None:
+                        break
+                self.frames = (self.frames[1], FrameSnapshot(state, scheduler.clock()))
+                if event is not None:
+                    self.event = event
+                    return
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.done.set()
+
+# Visual detail the quality governor steps through, full detail first:
+# (fraction of stars drawn, draw mountains, draw grass, ticks per drawn frame)
+QUALITY_LEVELS = (
+    (1.0, True, True, 1),
+    (0.5, True, True, 1),
+    (0.25, False, True, 1),
+    (0.0, False, False, 1),
+    (0.0, False, False, 2),
+)
+QUALITY_BUDGET = 0.5  # Share of the tick interval a frame's update and render may use
+QUALITY_OVER_FRAMES = 3  # Consecutive frames over budget before shedding detail
+QUALITY_RESTORE_SECONDS = 2.0  # Time with headroom before restoring detail
+QUALITY_HEADROOM = 0.5  # A frame has headroom when it uses under this share of the budget
+
+# Trades visual detail for time when frames run over budget, so the
+# simulation keeps its tick rate on a busy host. Physics never changes,
+# only what gets drawn. Detail comes back one level at a time once frames
+# have stayed well under budget for a while.
+class QualityGovernor:
+    def __init__(self, interval, level=0, adaptive=True, budget=QUALITY_BUDGET, clock=time.perf_counter):
+        self.budget = interval * budget
+        self.clock = clock
+        self.level = level
+        self.adaptive = adaptive  # False pins the level
+        self.changes = 0
+        self.seconds = [0.0] * len(QUALITY_LEVELS)  # Time spent at each level
+        self.since = clock()  # When the current level began
+        self.over = 0  # Consecutive frames over budget
+        self.headroom_since = self.since
+        self.skipped = 0  # Frames not drawn in a row at a frame-skipping level
+
+    @property
+    def settings(self):
+        return QUALITY_LEVELS[self.level]
+
+    # Whether to draw this frame, given the level's frame skipping
+    def should_draw(self):
+        if self.skipped + 1 >= self.settings[3]:
+            self.skipped = 0
+            return True
+        self.skipped += 1
+        return False
+
+    # Account for one drawn frame: `cost` seconds of update and render work
+    # for `ticks` ticks
+    def record(self, cost, ticks):
+        if not self.adaptive:
+            return
+        now = self.clock()
+        if cost > self.budget * ticks or ticks > 1:  # Over budget, or the frame ran late
+            self.over += 1
+            self.headroom_since = now
+            if self.over >= QUALITY_OVER_FRAMES and self.level < len(QUALITY_LEVELS) - 1:
+                self.set_level(self.level + 1, now)
+            return
+        self.over = 0
+        if cost > self.budget * QUALITY_HEADROOM:
+            self.headroom_since = now
+        elif self.level and now - self.headroom_since >= QUALITY_RESTORE_SECONDS:
+            self.set_level(self.level - 1, now)
+
+    def set_level(self, level, now):
+        self.seconds[self.level] += now - self.since
+        self.since = self.headroom_since = now
+        self.level = level
+        self.changes += 1
+        self.over = 0
+        self.skipped = 0
+
+    def metrics(self):
+        seconds = list(self.seconds)
+        seconds[self.level] += self.clock() - self.since
+        return {
+            "quality": self.level,
+            "quality_changes": self.changes,
+            "seconds_at_quality": [round(value, 2) for value in seconds],
+        }
+
+# The governor for --quality: adaptive for "auto", otherwise pinned
+def quality_governor(options):
+    interval = 1.0 / options.tick_rate
+    if options.quality == "auto":
+        return QualityGovernor(interval)
+    return QualityGovernor(interval, int(options.quality), adaptive=False)
+
+# Per-phase timing of ticks and frames with perf_counter_ns. Each phase
+# keeps its last PROFILE_WINDOW samples for rolling percentiles, plus a
+# count, total and max over the whole run for the report.
+PROFILE_PHASES = ("spawn", "background", "collision", "tick", "render", "diff", "refresh", "frame")
+PROFILE_WINDOW = 1024
+PROFILE_HUD_INTERVAL = 0.5  # Seconds between overlay updates
+
+class PhaseTimes:
+    def __init__(self, window=PROFILE_WINDOW):
+        self.samples = array("q", bytes(8 * window))
+        self.index = 0  # Next slot to overwrite
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, ns):
+        self.samples[self.index] = ns
+        self.index = (self.index + 1) % len(self.samples)
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    # Nearest-rank percentiles (0-100) of the rolling window, in nanoseconds
+    def percentiles(self, *ps):
+        window = sorted(self.samples[:min(self.count, len(self.samples))])
+        if not window:
+            return [0] * len(ps)
+        return [window[min(len(window) - 1, int(p / 100 * len(window)))] for p in ps]
+
+class FrameProfiler:
+    def __init__(self, clock=time.perf_counter_ns):
+        self.clock = clock
+        self.phases = {name: PhaseTimes() for name in PROFILE_PHASES}
+        self.late_ticks = 0
+        self.dropped_ticks = 0
+        self.slow_frames = 0  # Frames whose work took longer than a tick
+        self._scheduler = None
+        self._late_seen = self._dropped_seen = 0
+        self._hud = ""
+        self._hud_due = 0
+        self.governor = None  # A QualityGovernor whose metrics join the report
+
+    # The simulation phases of step(), returning whether the player was hit
+    def time_step_phases(self, state):
+        clock = self.clock
+        phases = self.phases
+        start = clock()
+        spawn_entities(state)
+        spawned = clock()
+        move_background(state)
+        moved = clock()
+        hit = move_entities(state)
+        end = clock()
+        phases["spawn"].add(spawned - start)
+        phases["background"].add(moved - spawned)
+        phases["collision"].add(end - moved)
+        return hit
+
+    # Pick up late and dropped ticks; each life has its own scheduler
+    def count_ticks(self, scheduler):
+        if scheduler is not self._scheduler:
+            self._scheduler = scheduler
+            self._late_seen = self._dropped_seen = 0
+        self.late_ticks += scheduler.late_ticks - self._late_seen
+        self.dropped_ticks += scheduler.dropped_ticks - self._dropped_seen
+        self._late_seen = scheduler.late_ticks
+        self._dropped_seen = scheduler.dropped_ticks
+
+    def end_frame(self, start, interval):
+        elapsed = self.clock() - start
+        self.phases["frame"].add(elapsed)
+        if elapsed > interval * 1e9:
+            self.slow_frames += 1
+
+    # One-line summary for the in-game overlay, rebuilt twice a second
+    def hud(self):
+        now = self.clock()
+        if now >= self._hud_due:
+            self._hud_due = now + int(PROFILE_HUD_INTERVAL * 1e9)
+            p50, p95, p99 = (ns / 1e6 for ns in self.phases["frame"].percentiles(50, 95, 99))
+            self._hud = f"{p50:.1f}/{p95:.1f}/{p99:.1f}ms L{self.late_ticks} D{self.dropped_ticks}"
+            if self.governor is not None:
+                self._hud += f" Q{self.governor.level}"
+        return self._hud
+
+    def report(self):
+        phases = {}
+        for name, times in self.phases.items():
+            p50, p95, p99 = times.percentiles(50, 95, 99)
+            phases[name] = {
+                "count": times.count,
+                "mean_us": round(times.total / times.count / 1e3, 2) if times.count else 0,
+                "p50_us": round(p50 / 1e3, 2),
+                "p95_us": round(p95 / 1e3, 2),
+                "p99_us": round(p99 / 1e3, 2),
+                "max_us": round(times.max / 1e3, 2),
+            }
+        report = {
+            "late_ticks": self.late_ticks,
+            "dropped_ticks": self.dropped_ticks,
+            "slow_frames": self.slow_frames,
+            "phases": phases,
+        }
+        if self.governor is not None:
+            report.update(self.governor.metrics())
+        return report
+
+    # Write the report as CSV if path ends in .csv, otherwise as JSON
+    def dump(self, path):
+        report = self.report()
+        with open(path, "w", newline="") as file:
+            if not path.endswith(".csv"):
+                json.dump(report, file, indent=2)
+                return
+            writer = csv.writer(file)
+            columns = ["count", "mean_us", "p50_us", "p95_us", "p99_us", "max_us"]
+            writer.writerow(["phase"] + columns)
+            for name, stats in report["phases"].items():
+                writer.writerow([name] + [stats[column] for column in columns])
+            for counter in ("late_ticks", "dropped_ticks", "slow_frames"):
+                writer.writerow([counter, report[counter]])
+            if self.governor is not None:
+                writer.writerow(["quality", report["quality"]])
+                writer.writerow(["quality_changes", report["quality_changes"]])
+                for level, seconds in enumerate(report["seconds_at_quality"]):
+                    writer.writerow([f"seconds_at_quality_{level}", seconds])
+
+# Gameplay and frame-time events, logged for every session when the game
+# is run with --telemetry DIR. The game only appends events to a bounded
+# queue; a background thread writes them out in batches, so no tick ever
+# waits on the disk. Logs are gzipped JSON lines, one event per line, each
+# batch its own gzip member so a file stays readable up to the last flush.
+# A session moves on to a new file past TELEMETRY_FILE_BYTES, and the
+# oldest files in the directory are removed past TELEMETRY_FILES, except
+# ones written within TELEMETRY_KEEP_SECONDS, which may belong to a
+# session still running.
+TELEMETRY_QUEUE = 4096  # Events held for the writer; the oldest are dropped past this
+TELEMETRY_FLUSH_SECONDS = 5.0
+TELEMETRY_FILE_BYTES = 1 << 20
+TELEMETRY_FILES = 100
+TELEMETRY_KEEP_SECONDS = 24 * 3600
+TELEMETRY_FRAME_SAMPLES = 600  # Frames summarized by each frame-time event
+TELEMETRY_FRAME_BUCKETS_MS = (2, 4, 8, 16, 33, 50, 100, 250)  # Upper edges of the frame-time histogram
+TELEMETRY_FILE_PREFIX = "telemetry-"
+TELEMETRY_FILE_SUFFIX = ".jsonl.gz"
+
+class Telemetry:
+    def __init__(self, directory, clock=time.time):
+        self.directory = directory
+        self.clock = clock
+        os.makedirs(directory, exist_ok=True)
+        self.started = clock()
+        self.session = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started))}-{os.getpid()}"
+        self.queue = deque(maxlen=TELEMETRY_QUEUE)
+        self.queued = 0  # Events ever queued; the writer counts what it took to find drops
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0  # Batches lost to a failed write
+        self.prune_errors = 0  # Old log files that could not be removed
+        self.frames = []  # Frame times in seconds, handed to the writer in batches
+        self.part = 0
+        self._wake = threading.Event()
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+        self.record("session_start", pid=os.getpid())
+
+    # Queue one event. Cheap enough for the tick path: no I/O, no locking.
+    def record(self, event, **fields):
+        fields["event"] = event
+        fields["time"] = round(self.clock(), 3)
+        self.queue.append(fields)
+        self.queued += 1
+
+    # Note how long one frame's work took, in seconds
+    def frame(self, seconds):
+        frames = self.frames
+        frames.append(seconds)
+        if len(frames) >= TELEMETRY_FRAME_SAMPLES:
+            self.frames = []
+            self.record("frames", samples=frames)  # Summarized by the writer
+
+    # Flush everything queued, end the session and wait for the writer
+    def close(self):
+        if self.frames:
+            self.record("frames", samples=self.frames)
+            self.frames = []
+        self.record("session_end", seconds=round(self.clock() - self.started, 1))
+        self._stop = True
+        self._wake.set()
+        self._thread.join()
+
+    def path(self):
+        return os.path.join(self.directory,
+                            f"{TELEMETRY_FILE_PREFIX}{self.session}-{self.part:03d}{TELEMETRY_FILE_SUFFIX}")
+
+    def _run(self):
+        taken = 0
+        while True:
+            stop = self._stop
+            if not stop:
+                self._wake.wait(TELEMETRY_FLUSH_SECONDS)
+                stop = self._stop
+            batch = []
+            queue = self.queue
+            while queue:
+                batch.append(queue.popleft())
+            taken += len(batch)
+            self.dropped = self.queued - taken - len(queue)  # Exact once the game stops recording
+            if batch:
+                self._write(batch)
+            if stop:
+                return
+
+    def _write(self, batch):
+        lines = []
+        for event in batch:
+            if event["event"] == "frames":
+                event.update(frame_summary(event.pop("samples")))
+            elif event["event"] == "session_end":
+                event.update(dropped=self.dropped, write_errors=self.errors, prune_errors=self.prune_errors)
+            event["session"] = self.session
+            lines.append(json.dumps(event, separators=(",", ":")))
+        try:
+            path = self.path()
+            with gzip.open(path, "at", encoding="utf-8") as file:
+                file.write("\n".join(lines) + "\n")
+            self.written += len(batch)
+            full = os.path.getsize(path) >= TELEMETRY_FILE_BYTES
+        except OSError:
+            self.errors += 1
+            return
+        if full:
+            self.part += 1
+            self._prune()
+
+    # Remove the oldest log files past TELEMETRY_FILES; names sort by start
+    # time. Other sessions prune the same directory, so a file may already
+    # be gone.
+    def _prune(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            self.prune_errors += 1
+            return
+        logs = sorted(name for name in names
+                      if name.startswith(TELEMETRY_FILE_PREFIX) and name.endswith(TELEMETRY_FILE_SUFFIX))
+        current = os.path.basename(self.path())
+        cutoff = time.time() - TELEMETRY_KEEP_SECONDS
+        for name in logs[:-TELEMETRY_FILES]:
+            if name == current:
+                continue
+            path = os.path.join(self.directory, name)
             try:
-                stdscr.addstr(y + i, int(x), line)
-            except curses.error:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except FileNotFoundError:
                 pass
-
-def game_loop(stdscr, lives, score, obstacle_speed_multiplier, high_score, level_number, obstacle_count_multiplier):
+            except OSError:
+                self.prune_errors += 1
+
+# Frame times (seconds) as a telemetry event's fields: nearest-rank
+# percentiles in milliseconds, and a histogram over TELEMETRY_FRAME_BUCKETS_MS
+# (plus one bucket for anything slower) that adds up across events
+def frame_summary(samples):
+    ms = sorted(sample * 1e3 for sample in samples)
+    histogram = [0] * (len(TELEMETRY_FRAME_BUCKETS_MS) + 1)
+    for value in ms:
+        histogram[bisect.bisect_left(TELEMETRY_FRAME_BUCKETS_MS, value)] += 1
+    count = len(ms)
+    return {
+        "count": count,
+        "mean_ms": round(sum(ms) / count, 3),
+        "p50_ms": round(ms[min(count - 1, int(0.50 * count))], 3),
+        "p95_ms": round(ms[min(count - 1, int(0.95 * count))], 3),
+        "p99_ms": round(ms[min(count - 1, int(0.99 * count))], 3),
+        "max_ms": round(ms[-1], 3),
+        "histogram": histogram,
+    }
+
+# Smallest terminal the game lays out in
+MIN_SCREEN_HEIGHT = 12
+MIN_SCREEN_WIDTH = 40
+
+# Wait, showing a notice, until the terminal is big enough to play in;
+# returns its size
+def wait_for_usable_size(stdscr):
+    sh, sw = stdscr.getmaxyx()
+    while sh < MIN_SCREEN_HEIGHT or sw < MIN_SCREEN_WIDTH:
+        stdscr.erase()
+        try:
+            stdscr.addstr(0, 0, f"Enlarge the terminal to {MIN_SCREEN_WIDTH}x{MIN_SCREEN_HEIGHT}"[:sw - 1])
+        except curses.error:
+            pass
+        stdscr.refresh()
+        stdscr.timeout(-1)
+        stdscr.getch()
+        sh, sw = stdscr.getmaxyx()
+    stdscr.nodelay(1)
+    return sh, sw
+
+# Drive one life of the game in a curses window
+def game_loop(stdscr, lives, score, obstacle_speed_multiplier, high_score, level_number, options=None, seed=None, recorder=None, profiler=None, governor=None, autopilot=None,
+              telemetry=None):
+    options = options or parse_args([])
+    governor = governor or quality_governor(options)
+    autopilot = autopilot or game_autopilot(options)
     # Setup screen
     curses.curs_set(0)  # Hide the cursor
     stdscr.nodelay(1)   # Non-blocking input
 
     # Get screen dimensions
-    sh, sw = stdscr.getmaxyx()  # Screen height and width
+    sh, sw = wait_for_usable_size(stdscr)  # Screen height and width
     w = curses.newwin(sh, sw, 0, 0)  # Create a new window for the game
 
-    # Player starting position and state
-    player_x = sw // 6
-    player_y = sh - 4  # Start player on the ground level
-    player_width = 3  # Width of the player character
-    player_height = 3  # Height of the player character
-    velocity = 0  # Upward velocity for jumping
-    is_jumping = False
-
-    # Obstacles
-    obstacles = []
-    obstacle_gap = 30  # Increase gap for larger obstacles
-
-    base_obstacle_speed = 2  # Base speed for consistent gameplay
-    obstacle_speed = base_obstacle_speed * obstacle_speed_multiplier
-
-    # Grass structures
-    grass_structures = []
-
-    # Additional structures
-    structures = []
-
-    # Stars
-    stars = []
-    star_speed = 0.5  # Star scroll speed, slower for parallax effect
-    max_stars = 90  # Maximum number of stars on screen at a time
-
-    # Mountains
-    mountains = []
-    mountain_speed = 0.8  # Mountain scroll speed, slightly faster than stars
-    mountain_y = sh - 10  # Position of the mountains vertically at ground level
-
-    # Create initial stars
-    for _ in range(max_stars):
-        star_x = random.randint(0, sw - 1)
-        star_y = random.randint(0, sh - 1)
-        stars.append([star_x, star_y])
-
-    # Create initial mountains (only on levels divisible by 3)
-    if level_number % 3 == 0:
-        for i in range(0, sw, 40):
-            mountains.append([i, mountain_y])
-
-    # Movement controls
-    move_left = False
-    move_right = False
-    hold_position = False
-
-    # Game loop timing control
-    last_update_time = time.time()
+    def new_state():
+        state = GameState(sh, sw, lives, score, obstacle_speed_multiplier, high_score, level_number,
+                          options.stars, seed,
+                          world_executor=world_executor() if options.world_thread else None)
+        state.profiler = profiler
+        return state
+
+    state = new_state()
+    if recorder is not None and recorder.size != (sh, sw):
+        recorder.record_resize(sh, sw)
+    buf = FrameBuffer(sh, sw)
+    perf_hud = profiler is not None and options.perf_hud
+    if options.output == "ansi":
+        # Let curses paint its blank window first; after that it has nothing
+        # to send and the game's escape sequences go straight to the terminal
+        w.noutrefresh()
+        curses.doupdate()
+        output = AnsiOutput(sys.stdout.buffer, options.max_bps, window=w)
+    else:
+        output = CursesOutput(w)
+
+    # Re-lay out the running life for a new terminal size and repaint
+    def adopt_new_size():
+        nonlocal sh, sw, state, buf
+        output.release()
+        sh, sw = wait_for_usable_size(stdscr)
+        w.resize(sh, sw)
+        w.clearok(True)
+        if state.ticks:
+            state.resize(sh, sw)
+        else:
+            state = new_state()  # Nothing has happened yet; start the life at the new size
+        buf = FrameBuffer(sh, sw)
+        if recorder is not None:
+            recorder.record_resize(sh, sw)
+        render(buf, state, options.frame_stats, perf_hud and profiler.hud(), governor.settings)
+        output.present(buf)
+
+    # Draw `view` (the state or a snapshot of it) unless the governor is
+    # shedding this frame; `work_start` is when the frame's work began
+    def draw(view, ticks, work_start, frame_start=None):
+        if not governor.should_draw():
+            return
+        if profiler is None:
+            render(buf, view, options.frame_stats, None, governor.settings)
+            output.present(buf)
+        else:
+            clock = profiler.clock
+            render_start = clock()
+            render(buf, view, options.frame_stats, perf_hud and profiler.hud(), governor.settings)
+            diff_start = clock()
+            output.stage(buf)
+            refresh_start = clock()
+            output.send()
+            end = clock()
+            profiler.phases["render"].add(diff_start - render_start)
+            profiler.phases["diff"].add(refresh_start - diff_start)
+            profiler.phases["refresh"].add(end - refresh_start)
+            profiler.end_frame(frame_start, scheduler.interval)
+        cost = time.perf_counter() - work_start
+        governor.record(cost, ticks)
+        if telemetry is not None:
+            telemetry.frame(cost)
+
+    # Log the event that ended a run of ticks
+    def report(event):
+        if telemetry is None:
+            return
+        if event == LIFE_LOST:
+            telemetry.record("life_lost", level=state.level_number, score=state.score, cause=state.death_cause,
+                             ticks=state.ticks, lives=state.lives - 1, autopilot=autopilot.on)
+        else:
+            telemetry.record("level_up", level=state.level_number, score=state.score, ticks=state.ticks,
+                             autopilot=autopilot.on)
 
     # Initial render before entering main loop
-    w.clear()
-    w.border(0)
-
-    # Render initial stars
-    for star in stars:
-        if 0 <= int(star[0]) < sw and 0 <= int(star[1]) < sh:
-            try:
-                w.addstr(int(star[1]), int(star[0]), "*")
-            except curses.error:
-                pass
-
-    # Render initial grass structures
-    for grass in grass_structures:
-        if 0 <= grass[0] < sw:
-            for i, line in enumerate(grass[3]):
-                try:
-                    w.addstr(grass[1] - 1 + i, grass[0], line)
-                except curses.error:
-                    pass
-
-    # Render initial player position
-    try:
-        w.addstr(int(player_y), player_x, " 0 ")
-        w.addstr(int(player_y) + 1, player_x, "/|\\")
-        w.addstr(int(player_y) + 2, player_x, "/| ")
-    except curses.error:
-        pass
-
-    w.refresh()
+    render(buf, state, options.frame_stats, perf_hud and profiler.hud(), governor.settings)
+    output.present(buf)
+
+    scheduler = FrameScheduler(options.tick_rate)
+    keys = KeyInput(scheduler.clock)
+
+    if options.sim_thread:
+        # This thread keeps curses to itself: it reads keys and draws the
+        # latest snapshot, blended towards the next tick, at its own rate
+        sim = SimulationThread(state, keys, scheduler, recorder, profiler, autopilot)
+        frames = FrameScheduler(options.fps, max_catch_up=1)
+        sim.start()
+        while True:
+            if keys.read(w, frames.timeout_ms()):
+                sim.stop()
+                adopt_new_size()
+                sim.state = state
+                if sim.event is None:  # Otherwise the tick that ended the level is handled below
+                    sim.start()
+                continue
+            if sim.done.is_set():
+                if sim.error is not None:
+                    raise sim.error
+                report(sim.event)
+                if sim.event == LIFE_LOST:
+                    if recorder is not None:
+                        recorder.end_life(state)
+                    output.release()
+                    return state.result()
+                render(buf, state, options.frame_stats, perf_hud and profiler.hud(), governor.settings)
+                output.present(buf)
+                output.release()
+                show_level_up(w, state.level_number)
+                buf.invalidate()  # The banner replaced everything on screen
+                sim.start()
+                frames.reset()
+                continue
+            if not frames.due_ticks():
+                continue
+            work_start = time.perf_counter()
+            frame_start = profiler.clock() if profiler is not None else None
+            prev, frame = sim.frames
+            alpha = (scheduler.clock() - frame.time) / scheduler.interval
+            draw(interpolate_frame(prev, frame, alpha), 1, work_start, frame_start)
 
     # Game loop
     while True:
-        # Capture input without halting game loop
-        key = w.getch()
-
-        # Key press logic for setting movement direction
-        if key in [ord(" "), ord("w")]:  # Space bar or "W" to jump
-            if not is_jumping:  # Only allow jumping if on the ground
-                velocity = -2  # Initial jump velocity
-                is_jumping = True
-        elif key == ord("a"):  # "A" key for moving left
-            move_left = True
-            move_right = False
-            hold_position = False
-        elif key == ord("d"):  # "D" key for moving right
-            move_right = True
-            move_left = False
-            hold_position = False
-        elif key in [ord("s"), curses.KEY_DOWN]:  # "S" key or down arrow to hold position
-            hold_position = True
-            move_left = move_right = False
-        elif key == -1:  # No input
-            move_left = move_right = hold_position = False
-
-        # Time-based game loop update
-        current_time = time.time()
-        if current_time - last_update_time > 0.05:  # Update every 50 ms
-            # Apply gravity to the player at all times
-            velocity += 0.2  # Gravity effect
-            player_y += velocity
-
-            # Ensure player stays within vertical bounds
-            if player_y > sh - player_height - 1:  # Ground level for the player
-                player_y = sh - player_height - 1
-                velocity = 0
-                is_jumping = False
-            elif player_y < 0:  # Prevent player from going above the screen
-                player_y = 0
-                velocity = 0
-
-            # Apply horizontal movement
-            if move_left:
-                player_x -= 1
-                if player_x < 0:  # Lose a life if player moves off the left side
-                    return True, score, obstacle_speed_multiplier, high_score, level_number, obstacle_count_multiplier  # Lose a life without resetting score
-            elif move_right:
-                player_x = min(sw - player_width, player_x + 1)  # Ensure player stays in bounds
-
-            # Auto-scroll obstacles
-            if len(obstacles) == 0 or (obstacles[-1][0] < sw - random.randint(obstacle_gap // 2, obstacle_gap * 1.5) and random.random() < 0.7):
-                # Randomized gap between obstacles using random.randint
-                # More frequent spawning (70% chance)
-                spawn_count = random.randint(1, math.ceil(obstacle_count_multiplier) + 1)  # Randomly decide how many obstacles to spawn
-                for _ in range(spawn_count):
-                    obstacle_y = random.randint(2, sh - 5)  # Random vertical position, avoiding edges
-                    rand_value = random.random()
-                    if rand_value < 0.5:
-                        new_obstacle = [sw - 1, obstacle_y, '2x2']  # Add 2x2 obstacle at rightmost edge
-                    elif rand_value < 0.8:
-                        new_obstacle = [sw - 1, obstacle_y, '5x3']  # Add 5x3 obstacle at rightmost edge
-                    else:
-                        new_obstacle = [sw - 1, obstacle_y, 'new']  # Add new obstacle at rightmost edge
-
-                    # Ensure obstacle does not spawn within 5 characters of any other obstacle or 2 characters of a structure
-                    if (not any(abs(new_obstacle[0] - structure[0]) < 2 for structure in structures) and
-                        not any(abs(new_obstacle[0] - obs[0]) < 5 for obs in obstacles)):
-                        obstacles.append(new_obstacle)
-
-            # Generate structures (only on levels 2 and after)
-            if level_number >= 2:
-                structure_spawn_chance = 0.01 if level_number == 2 else min(0.01 + 0.05 * (level_number - 3), 1.0)
-                if len(structures) == 0 or (structures[-1][0] < sw - 40 and random.random() < structure_spawn_chance):
-                    structures.append([sw, sh - 6])  # Spawn offscreen to the right
-
-            # Generate grass structures (simplified for troubleshooting)
-            if len(grass_structures) == 0 or grass_structures[-1][0] < sw - (obstacle_gap * 0.25):
-                if random.random() < 0.6:  # 60% chance to add a grass structure
-                    grass_y = sh - 1  # Grass is pinned to the ground
-                    grass_height = 2
-                    grass_type = random.choice([
-                        ('⠀⠀⣴⣄⠀⢰⡏⣸⠀⣴⠏', '⠀⢠⣿⠙⣦⡟⢠⣿⣿⢏⡀'),
-                        ('⠀⠀⠀⠀⣿⣇⠀⠀⢠⣧⠀⠀⢀⣀', '⠰⣶⣀⠀⠀⣿⢿⡄⣸⡿⣿⣤⡶⣿⠏'),
-                        ('⠀⠀⠀⠀⠀⠀⠀⠀⠀⣰⣇⠀⣀⠀⠀⢀⣴⡶⣩⠿⠋⠁', '⠀⠀⠠⢤⣤⣄⡀⠀⢀⡿⣿⣼⣻⢁⣴⠟⢥⣿⠟⠁⠀⠀'),
-                        ('⠀⠀  ⠀⣰⠇       ', '⣄⠀⢠⣾⡏⢀⣠⣾⠆')
-                    ])
-                    grass_structures.append([sw - 6, grass_y, grass_height, grass_type])
-
-            # Move stars leftward
-            new_stars = []
-            for star in stars:
-                star[0] -= star_speed  # Move star left by star_speed
-                if 0 <= star[0] < sw and 0 <= star[1] < sh:  # Ensure star fits on screen
-                    new_stars.append(star)
-                else:
-                    # Star has moved off-screen, respawn on the right edge
-                    new_stars.append([sw - 1, random.randint(0, sh - 1)])
-
-            # Occasionally add a new star to maintain density
-            if len(new_stars) < max_stars:
-                new_stars.append([sw - 1, random.randint(0, sh - 1)])
-
-            stars = new_stars
-
-            # Move mountains leftward (only if level is divisible by 3)
-            if level_number % 3 == 0:
-                new_mountains = []
-                for mountain in mountains:
-                    mountain[0] -= mountain_speed  # Move mountain left by mountain_speed
-                    if mountain[0] > -40:  # Ensure mountain fits on screen
-                        new_mountains.append(mountain)
-                    else:
-                        # Mountain has moved off-screen, respawn on the right edge
-                        new_mountains.append([sw - 1, mountain_y])
-                mountains = new_mountains
-
-            # Move obstacles, structures, and grass leftward and check for collisions
-            new_obstacles = []
-            new_grass_structures = []
-            new_structures = []
-
-            for obs in obstacles:
-                obs[0] -= int(obstacle_speed)  # Ensure obstacle position is always an integer
-
-                # Check for collisions with the obstacle
-                obs_width, obs_height = (5, 3) if obs[2] == '5x3' else (2, 2)
-                if ((player_x < obs[0] + obs_width and player_x + player_width > obs[0]) and
-                    (player_y < obs[1] + obs_height and player_y + player_height > obs[1])):
-                    return True, score, obstacle_speed_multiplier, high_score, level_number, obstacle_count_multiplier  # Lose a life upon collision
-
-                if obs[0] > 0:
-                    new_obstacles.append(obs)
-
-            for structure in structures:
-                structure[0] -= int(obstacle_speed)
-
-                # Check for collisions with the structure
-                structure_width = 6  # Width of the structure
-                structure_height = 5  # Height of the structure
-                if ((player_x < structure[0] + structure_width and player_x + player_width > structure[0]) and
-                    (player_y + player_height > structure[1] and player_y < structure[1] + structure_height)):
-                    # Collision from the left or right of the structure
-                    if player_x + player_width > structure[0] and player_x < structure[0] + structure_width // 2:  # Collision from the left
-                        player_x = structure[0] - player_width
-                        move_right = False  # Prevent moving right through the structure
-                    elif player_x < structure[0] + structure_width and player_x > structure[0] + structure_width // 2:  # Collision from the right
-                        player_x = structure[0] + structure_width
-                        move_left = False  # Prevent moving left through the structure
-                    velocity = 0  # Stop vertical movement
-                    is_jumping = False
-
-                # Stop vertical movement if on top of the structure
-                if (player_y + player_height == structure[1] and
-                    player_x + player_width > structure[0] and player_x < structure[0] + structure_width):
-                    player_y = structure[1] - player_height
-                    velocity = 0
-                    is_jumping = False
-
-                if structure[0] > 0:
-                    new_structures.append(structure)
-
-            for grass in grass_structures:
-                grass[0] -= int(obstacle_speed)
-                if grass[0] > 0:
-                    new_grass_structures.append(grass)
-
-            obstacles = new_obstacles
-            structures = new_structures
-            grass_structures = new_grass_structures
-
-            # Rendering
-            w.clear()
-            w.border(0)
-
-            # Render stars
-            for star in stars:
-                if 0 <= int(star[0]) < sw and 0 <= int(star[1]) < sh:  # Ensure star fits on screen
-                    try:
-                        w.addstr(int(star[1]), int(star[0]), "*")
-                    except curses.error:
-                        pass
-
-            # Render mountains (only if level is divisible by 3)
-            if level_number % 3 == 0:
-                for mountain in mountains:
-                    draw_mountains(w, mountain[0], mountain[1])
-
-            # Render grass structures (before obstacles and player)
-            for grass in grass_structures:
-                if 0 <= grass[0] < sw:
-                    for i, line in enumerate(grass[3]):
-                        try:
-                            w.addstr(grass[1] - 1 + i, grass[0], line)
-                        except curses.error:
-                            pass
-
-            # Render structures
-            for structure in structures:
-                draw_structure(w, structure[0], structure[1])
-
-            # Render obstacles
-            for obs in obstacles:
-                if obs[2] == '5x3':
-                    if 0 <= obs[1] < sh - 3:  # Ensure obstacle fits on screen
-                        try:
-                            w.addstr(obs[1], int(obs[0]), "./-\\. ")
-                            w.addstr(obs[1] + 1, int(obs[0]), "< 8 >")
-                            w.addstr(obs[1] + 2, int(obs[0]), "^\-/^")
-                        except curses.error:
-                            pass
-                elif obs[2] == '2x2':
-                    if 0 <= obs[1] < sh - 1:  # Ensure obstacle fits on screen
-                        try:
-                            w.addstr(obs[1], int(obs[0]), "\\/")
-                            w.addstr(obs[1] + 1, int(obs[0]), "/\\")
-                        except curses.error:
-                            pass
-                elif obs[2] == 'new':
-                    pass
-
-            # Render player (after obstacles and grass to be in front)
-            if 0 <= player_y < sh - player_height:
-                try:
-                    w.addstr(int(player_y), player_x, " 0 ")
-                    w.addstr(int(player_y) + 1, player_x, "/|\\")
-                    w.addstr(int(player_y) + 2, player_x, "/| ")
-                except curses.error:
-                    pass
-
-            # Update and render score
-            score += 1
-            try:
-                w.addstr(0, sw // 2 - 5, f"Score: {score}")
-                # Update and render high score
-                if score > high_score:
-                    high_score = score
-                w.addstr(0, sw - 20, f"High Score: {high_score}")
-                # Display level number
-                w.addstr(0, 2, f"Level: {level_number}")
-                # Display extra lives remaining (hearts)
-                extra_lives_display = " ".join(["<3"] * (lives - 1))
-                w.addstr(1, sw // 2 - 10, f"Extra lives: {extra_lives_display}")
-            except curses.error:
-                pass
-
-
-            # Refresh screen
-            w.refresh()
-
-            # Update the last update time
-            last_update_time = current_time
-
-            # Check for level-up
-            if score % 500 == 0 and score != 0:
-                obstacle_speed_multiplier *= 1.2  # Increase obstacle speed by 20%
-                obstacle_count_multiplier *= 1.3  # Increase obstacle count by 30%
-                level_number += 1  # Increase level number
-                # Display Level Up screen
-                w.clear()
-                try:
-                    w.addstr(sh // 2 - 5, sw // 2 - 30, " _   _ _              _   _                   __              ")
-                    w.addstr(sh // 2 - 4, sw // 2 - 30, "| \ | (_) ___ ___    | |_(_)_ __ ___   ___   / _| ___  _ __   ")
-                    w.addstr(sh // 2 - 3, sw // 2 - 30, "|  \| | |/ __/ _ \   | __| | '_ ` _ \ / _ \ | |_ / _ \| '__|  ")
-                    w.addstr(sh // 2 - 2, sw // 2 - 30, "| |\  | | (_|  __/_  | |_| | | | | | |  __/ |  _| (_) | |     ")
-                    w.addstr(sh // 2 - 1, sw // 2 - 30, "|_| \_|_|\___\___( )  \__|_|_| |_| |_|\___| |_|  \___/|_|     ")
-                    w.addstr(sh // 2, sw // 2 - 30, "  __ _ _ __   ___|/ |_| |__   ___ _ __    ___  _ __   ___     ")
-                    w.addstr(sh // 2 + 1, sw // 2 - 30, " / _` | '_ \ / _ \| __| '_ \ / _ \ '__|  / _ \| '_ \ / _ \    ")
-                    w.addstr(sh // 2 + 2, sw // 2 - 30, "| (_| | | | | (_) | |_| | | |  __/ |    | (_) | | | |  __/_ _ ")
-                    w.addstr(sh // 2 + 3, sw // 2 - 30, " \__,_|_| |_|\___/ \__|_| |_|\___|_|     \___/|_| |_|\___(_|_)")
-                    w.addstr(sh // 2 + 5, sw // 2 - 10, f"Level {level_number} - Press Enter to continue")
-                    w.refresh()
-                except curses.error:
-                    pass
-                while True:
-                    key = w.getch()
-                    if key == ord("\n") or key == curses.KEY_ENTER:
-                        break
-
-
-
-
-def main(stdscr):
-    sh, sw = stdscr.getmaxyx()
-    stdscr.clear()
-    stdscr.addstr(sh // 2 - 7, sw // 2 - 25, "                               _         ")
-    stdscr.addstr(sh // 2 - 6, sw // 2 - 25, "  ___  _ __   ___   _ __ _   _| | ___    ")
-    stdscr.addstr(sh // 2 - 5, sw // 2 - 25, " / _ \| '_ \ / _ \ | '__| | | | |/ _ \   ")
-    stdscr.addstr(sh // 2 - 4, sw // 2 - 25, "| (_) | | | |  __/ | |  | |_| | |  __/_  ")
-    stdscr.addstr(sh // 2 - 3, sw // 2 - 25, " \___/|_| |_|\___| |_|   \__,_|_|\___(_) ")
-    stdscr.addstr(sh // 2 - 2, sw // 2 - 25, "     _             _     ____ ___ _____  ")
-    stdscr.addstr(sh // 2 - 1, sw // 2 - 25, "  __| | ___  _ __ | |_  |  _ \_ _| ____| ")
-    stdscr.addstr(sh // 2, sw // 2 - 25, " / _` |/ _ \| '_ \| __| | | | | ||  _|   ")
-    stdscr.addstr(sh // 2 + 1, sw // 2 - 25, "| (_| | (_) | | | | |_  | |_| | || |___  ")
-    stdscr.addstr(sh // 2 + 2, sw // 2 - 25, " \__,_|\___/|_| |_|\__| |____/___|_____| ")
-
-    # Add a box with game controls on the title screen
-    controls_start_y = sh // 2 - 5
-    controls_start_x = sw // 2 + 20
-    stdscr.addstr(controls_start_y, controls_start_x, "+------------------+")
-    stdscr.addstr(controls_start_y + 1, controls_start_x, "|  Game Controls   |")
-    stdscr.addstr(controls_start_y + 2, controls_start_x, "|------------------|")
-    stdscr.addstr(controls_start_y + 3, controls_start_x, "| SPACE or W: Jump |")
-    stdscr.addstr(controls_start_y + 4, controls_start_x, "| A: Move Left     |")
-    stdscr.addstr(controls_start_y + 5, controls_start_x, "| D: Move Right    |")
-    stdscr.addstr(controls_start_y + 6, controls_start_x, "| S: Hold Position |")
-    stdscr.addstr(controls_start_y + 7, controls_start_x, "+------------------+")
-
-    stdscr.addstr(sh // 2 + 4, sw // 2 - 10, "Press Enter to start")
-    stdscr.refresh()
+        # Sleep until the next tick is due or a key arrives, then take every queued key
+        if keys.read(w, scheduler.timeout_ms()):
+            adopt_new_size()
+            scheduler.reset()
+            continue
+
+        ticks = scheduler.due_ticks()
+        if not ticks:
+            continue
+        work_start = time.perf_counter()
+        frame_start = None
+        if profiler is not None:
+            frame_start = profiler.clock()
+            profiler.count_ticks(scheduler)
+
+        # Catch up on late ticks before drawing a single frame
+        event = None
+        for _ in range(ticks):
+            code = autopilot.code(state, keys.snapshot())
+            if recorder is not None:
+                recorder.record(code)
+            if profiler is None:
+                event = step(state, ACTION_KEYS[code], scheduler.interval)
+            else:
+                tick_start = profiler.clock()
+                event = step(state, ACTION_KEYS[code], scheduler.interval)
+                profiler.phases["tick"].add(profiler.clock() - tick_start)
+            if event is not None:
+                break
+        if event is not None:
+            report(event)
+        if event == LIFE_LOST:
+            if recorder is not None:
+                recorder.end_life(state)
+            output.release()
+            return state.result()
+
+        draw(state, ticks, work_start, frame_start)
+
+        if event == LEVEL_UP:
+            output.release()
+            show_level_up(w, state.level_number)
+            buf.invalidate()  # The banner replaced everything on screen
+            scheduler.reset()
+
+
+def main(stdscr, options=None, profiler=None, telemetry=None):
+    options = options or parse_args([])
+    governor = quality_governor(options)  # Shared by every life, so its metrics cover the run
+    autopilot = game_autopilot(options)  # Stays switched on or off from one life to the next
+    if profiler is not None:
+        profiler.governor = governor
+    title = get_banner(TITLE_BANNER)
+    title.show(stdscr)
 
     # Wait for "Enter" to start the game
-    while True:
-        key = stdscr.getch()
-        if key == ord("\n") or key == curses.KEY_ENTER:
-            break
+    wait_for_enter(stdscr, title)
 
     high_score = 0  # Track high score across games
 
@@ -512,237 +2895,143 @@ def main(stdscr):
         score = 0  # Reset score when starting a new game
         obstacle_speed_multiplier = 1.0  # Start with base obstacle speed
         level_number = 1  # Start at level 1
-        obstacle_count_multiplier = 1.0  # Start with base obstacle count
-
-        while lives > 0:
-            lost_life, score, obstacle_speed_multiplier, high_score, level_number, obstacle_count_multiplier = game_loop(
-                stdscr, lives, score, obstacle_speed_multiplier, high_score, level_number, obstacle_count_multiplier)
-
-            if lost_life:
-                lives -= 1
-                if lives == 1:
-                    # Display "Second-to-Last Life" screen
-                    stdscr.clear()
-                    stdscr.addstr(sh // 2 - 5, sw // 2 - 30, " _        _    ____ _____   _     ___ _____ _____ _ ")
-                    stdscr.addstr(sh // 2 - 4, sw // 2 - 30, "| |      / \  / ___|_   _| | |   |_ _|  ___| ____| |")
-                    stdscr.addstr(sh // 2 - 3, sw // 2 - 30, "| |     / _ \ \___ \ | |   | |    | || |_  |  _| | |")
-                    stdscr.addstr(sh // 2 - 2, sw // 2 - 30, "| |___ / ___ \ ___) || |   | |___ | ||  _| | |___|_|")
-                    stdscr.addstr(sh // 2 - 1, sw // 2 - 30, "|_____/_/   \_\____/ |_|   |_____|___|_|   |_____(_)")
-                    stdscr.addstr(sh // 2 + 1, sw // 2 - 10, "Press Enter to continue")
-                    stdscr.refresh()
-
-                    # Wait for "Enter" to continue
-                    while True:
-                        key = stdscr.getch()
-                        if key == ord("\n") or key == curses.KEY_ENTER:
-                            break
-                elif lives > 1:
-                    # Display regular "Life Lost" screen if more than one life remains
-                    stdscr.clear()
-                    stdscr.addstr(sh // 2 - 3, sw // 2 - 30, " _____ _           _     _                _        ")
-                    stdscr.addstr(sh // 2 - 2, sw // 2 - 30, "|_   _| |__   __ _| |_  | |__  _   _ _ __| |_      ")
-                    stdscr.addstr(sh // 2 - 1, sw // 2 - 30, "  | | | '_ \\ / _` | __| | '_ \\| | | | '__| __|     ")
-                    stdscr.addstr(sh // 2, sw // 2 - 30, "  | | | | | | (_| | |_  | | | | |_| | |  | |_ _ _   ")
-                    stdscr.addstr(sh // 2 + 1, sw // 2 - 30, " _|_| |_| |_|\\__,_|\\__| |_| |_|\\__,_|_|  \\__(_|_)  ")
-                    stdscr.addstr(sh // 2 + 2, sw // 2 - 30, "|_ _| | | ___  ___| |_    __ _  | (_)/ _| ___       ")
-                    stdscr.addstr(sh // 2 + 3, sw // 2 - 30, " | |  | |/ _ \\/ __| __|  / _` | | | | |_ / _ \\      ")
-                    stdscr.addstr(sh // 2 + 4, sw // 2 - 30, " | |  | | (_) \\__ \\ |_  | (_| | | | |  _|  __/     ")
-                    stdscr.addstr(sh // 2 + 5, sw // 2 - 30, "|___| |_|\\___/|___/\\__|  \\__,_| |_|_|_|  \\___|      ")
-                    stdscr.addstr(sh // 2 + 6, sw // 2 - 10, f"Lives remaining: {lives}")
-                    stdscr.addstr(sh // 2 + 8, sw // 2 - 10, "Press Enter to continue")
-                    stdscr.refresh()
-
-
-                    # Wait for "Enter" to continue with one less life
-                    while True:
-                        key = stdscr.getch()
-                        if key == ord("\n") or key == curses.KEY_ENTER:
-                            break
 
-                if lives == 0:
-                    # Show Game Over screen if no lives remain
-                    stdscr.clear()
-                    stdscr.addstr(sh // 2 - 7, sw // 2 - 30, "     _     _ _             _                _                            ")
-                    stdscr.addstr(sh // 2 - 6, sw // 2 - 30, " ___| |__ (_) |_        __| | ___  __ _  __| |                           ")
-                    stdscr.addstr(sh // 2 - 5, sw // 2 - 30, "/ __| '_ \| | __|      / _` |/ _ \/ _` |/ _` |                           ")
-                    stdscr.addstr(sh // 2 - 4, sw // 2 - 30, "\__ \ | | | | |_ _ _  | (_| |  __/ (_| | (_| |                           ")
-                    stdscr.addstr(sh // 2 - 3, sw // 2 - 30, "|___/_| |_|_|\__(_|_)  \__,_|\___|\__,_|\__,_|                           ")
-                    stdscr.addstr(sh // 2 - 2, sw // 2 - 30, "       _                    _      ___   _      _         _              ")
-                    stdscr.addstr(sh // 2 - 1, sw // 2 - 30, "  __ _| |_ __ ___  __ _  __| |_   |__ \ | | ___| |_ ___  | |_ _ __ _   _ ")
-                    stdscr.addstr(sh // 2, sw // 2 - 30, " / _` | | '__/ _ \/ _` |/ _` | | | |/ / | |/ _ \ __/ __| | __| '__| | | |")
-                    stdscr.addstr(sh // 2 + 1, sw // 2 - 30, "| (_| | | | |  __/ (_| | (_| | |_| |_|  | |  __/ |_\__ \ | |_| |  | |_| |")
-                    stdscr.addstr(sh // 2 + 2, sw // 2 - 30, " \__,_|_|_|  \___|\__,_|\__,_|\__, (_)  |_|\___|\__|___/  \__|_|   \__, |")
-                    stdscr.addstr(sh // 2 + 3, sw // 2 - 30, "                              |___/                                |___/ ")
-                    stdscr.addstr(sh // 2 + 5, sw // 2 - 10, f"Final Score: {score}")
-                    stdscr.addstr(sh // 2 + 6, sw // 2 - 10, f"Personal High Score: {high_score}")
-
-                    # Check if score qualifies for top 10
-                    high_scores = load_high_scores()
-                    if len(high_scores) < 10 or score > high_scores[-1][0]:
-                        stdscr.addstr(sh // 2 + 8, sw // 2 - 10, "New High Score! Enter your name: ")
-                        stdscr.refresh()
-
-                        curses.echo()  # Enable echoing of characters to capture name
-                        # Show an underline where the user can type their name
-                        name_win = curses.newwin(1, 20, sh // 2 + 9, sw // 2 - 10)
-                        name_win.attron(curses.A_UNDERLINE)
-                        name_win.refresh()
-                        name = name_win.getstr().decode("utf-8").strip()
-                        curses.noecho()  # Disable echoing again
-
-                        update_high_scores(score, name, level_number)
-
-
-                    stdscr.addstr(sh // 2 + 11, sw // 2 - 10, "Press Enter to view High Scores")
-                    stdscr.refresh()
-
-                    # Wait for "Enter" to continue
-                    while True:
-                        key = stdscr.getch()
-                        if key == ord("\n") or key == curses.KEY_ENTER:
-                            break
-
-                    # Display the high score board
-                    display_high_scores(stdscr)
-                    break
-
-
-def main(stdscr):
-    sh, sw = stdscr.getmaxyx()
-    stdscr.clear()
-    stdscr.addstr(sh // 2 - 7, sw // 2 - 25, "                               _         ")
-    stdscr.addstr(sh // 2 - 6, sw // 2 - 25, "  ___  _ __   ___   _ __ _   _| | ___    ")
-    stdscr.addstr(sh // 2 - 5, sw // 2 - 25, " / _ \| '_ \ / _ \ | '__| | | | |/ _ \   ")
-    stdscr.addstr(sh // 2 - 4, sw // 2 - 25, "| (_) | | | |  __/ | |  | |_| | |  __/_  ")
-    stdscr.addstr(sh // 2 - 3, sw // 2 - 25, " \___/|_| |_|\___| |_|   \__,_|_|\___(_) ")
-    stdscr.addstr(sh // 2 - 2, sw // 2 - 25, "     _             _     ____ ___ _____  ")
-    stdscr.addstr(sh // 2 - 1, sw // 2 - 25, "  __| | ___  _ __ | |_  |  _ \_ _| ____| ")
-    stdscr.addstr(sh // 2, sw // 2 - 25, " / _` |/ _ \| '_ \| __| | | | | ||  _|   ")
-    stdscr.addstr(sh // 2 + 1, sw // 2 - 25, "| (_| | (_) | | | | |_  | |_| | || |___  ")
-    stdscr.addstr(sh // 2 + 2, sw // 2 - 25, " \__,_|\___/|_| |_|\__| |____/___|_____| ")
-
-    # Add a box with game controls on the title screen
-    controls_start_y = sh // 2 - 5
-    controls_start_x = sw // 2 + 20
-    stdscr.addstr(controls_start_y, controls_start_x, "+------------------+")
-    stdscr.addstr(controls_start_y + 1, controls_start_x, "|  Game Controls   |")
-    stdscr.addstr(controls_start_y + 2, controls_start_x, "|------------------|")
-    stdscr.addstr(controls_start_y + 3, controls_start_x, "| SPACE or W: Jump |")
-    stdscr.addstr(controls_start_y + 4, controls_start_x, "| A: Move Left     |")
-    stdscr.addstr(controls_start_y + 5, controls_start_x, "| D: Move Right    |")
-    stdscr.addstr(controls_start_y + 6, controls_start_x, "| S: Hold Position |")
-    stdscr.addstr(controls_start_y + 7, controls_start_x, "+------------------+")
-
-    stdscr.addstr(sh // 2 + 4, sw // 2 - 10, "Press Enter to start")
-    stdscr.refresh()
-
-    # Wait for "Enter" to start the game
-    while True:
-        key = stdscr.getch()
-        if key == ord("\n") or key == curses.KEY_ENTER:
-            break
-
-    high_score = 0  # Track high score across games
-
-    while True:
-        lives = 4  # Start with 4 lives, including the current life
-        score = 0  # Reset score when starting a new game
-        obstacle_speed_multiplier = 1.0  # Start with base obstacle speed
-        level_number = 1  # Start at level 1
-        obstacle_count_multiplier = 1.0  # Start with base obstacle count
+        # Every life's randomness derives from the game seed
+        game_seed = options.seed if options.seed is not None else random.getrandbits(63)
+        seeds = life_seeds(game_seed)
+        game_start = time.time()
+        recorder = None
+        if options.record:
+            recorder = ReplayRecorder(options.record, game_seed, *stdscr.getmaxyx(), lives, options.stars)
 
         while lives > 0:
-            lost_life, score, obstacle_speed_multiplier, high_score, level_number, obstacle_count_multiplier = game_loop(
-                stdscr, lives, score, obstacle_speed_multiplier, high_score, level_number, obstacle_count_multiplier)
+            lost_life, score, obstacle_speed_multiplier, high_score, level_number = game_loop(
+                stdscr, lives, score, obstacle_speed_multiplier, high_score, level_number, options, next(seeds), recorder, profiler, governor, autopilot, telemetry)
 
             if lost_life:
                 lives -= 1
                 if lives == 1:
                     # Display "Second-to-Last Life" screen
-                    stdscr.clear()
-                    stdscr.addstr(sh // 2 - 5, sw // 2 - 30, " _        _    ____ _____   _     ___ _____ _____ _ ")
-                    stdscr.addstr(sh // 2 - 4, sw // 2 - 30, "| |      / \  / ___|_   _| | |   |_ _|  ___| ____| |")
-                    stdscr.addstr(sh // 2 - 3, sw // 2 - 30, "| |     / _ \ \___ \ | |   | |    | || |_  |  _| | |")
-                    stdscr.addstr(sh // 2 - 2, sw // 2 - 30, "| |___ / ___ \ ___) || |   | |___ | ||  _| | |___|_|")
-                    stdscr.addstr(sh // 2 - 1, sw // 2 - 30, "|_____/_/   \_\____/ |_|   |_____|___|_|   |_____(_)")
-                    stdscr.addstr(sh // 2 + 1, sw // 2 - 10, "Press Enter to continue")
-                    stdscr.refresh()
+                    banner = get_banner(LAST_LIFE_BANNER)
+                    banner.show(stdscr)
 
                     # Wait for "Enter" to continue
-                    while True:
-                        key = stdscr.getch()
-                        if key == ord("\n") or key == curses.KEY_ENTER:
-                            break
+                    wait_for_enter(stdscr, banner)
                 elif lives > 1:
                     # Display regular "Life Lost" screen if more than one life remains
-                    stdscr.clear()
-                    stdscr.addstr(sh // 2 - 3, sw // 2 - 30, " _____ _           _     _                _        ")
-                    stdscr.addstr(sh // 2 - 2, sw // 2 - 30, "|_   _| |__   __ _| |_  | |__  _   _ _ __| |_      ")
-                    stdscr.addstr(sh // 2 - 1, sw // 2 - 30, "  | | | '_ \\ / _` | __| | '_ \\| | | | '__| __|     ")
-                    stdscr.addstr(sh // 2, sw // 2 - 30, "  | | | | | | (_| | |_  | | | | |_| | |  | |_ _ _   ")
-                    stdscr.addstr(sh // 2 + 1, sw // 2 - 30, " _|_| |_| |_|\\__,_|\\__| |_| |_|\\__,_|_|  \\__(_|_)  ")
-                    stdscr.addstr(sh // 2 + 2, sw // 2 - 30, "|_ _| | | ___  ___| |_    __ _  | (_)/ _| ___       ")
-                    stdscr.addstr(sh // 2 + 3, sw // 2 - 30, " | |  | |/ _ \\/ __| __|  / _` | | | | |_ / _ \\      ")
-                    stdscr.addstr(sh // 2 + 4, sw // 2 - 30, " | |  | | (_) \\__ \\ |_  | (_| | | | |  _|  __/     ")
-                    stdscr.addstr(sh // 2 + 5, sw // 2 - 30, "  |___| |_|\\___/|___/\\__|  \\__,_| |_|_|_|  \\___|      ")
-                    stdscr.addstr(sh // 2 + 6, sw // 2 - 10, f"Lives remaining: {lives}")
-                    stdscr.addstr(sh // 2 + 8, sw // 2 - 10, "Press Enter to continue")
-                    stdscr.refresh()
-
+                    banner = get_banner(LIFE_LOST_BANNER)
+                    banner.text(6, -10, f"Lives remaining: {lives}")
+                    banner.show(stdscr)
 
                     # Wait for "Enter" to continue with one less life
-                    while True:
-                        key = stdscr.getch()
-                        if key == ord("\n") or key == curses.KEY_ENTER:
-                            break
+                    wait_for_enter(stdscr, banner)
 
                 if lives == 0:
+                    if recorder is not None:
+                        recorder.close()
+                    if telemetry is not None:
+                        telemetry.record("game_over", score=score, level=level_number, high_score=high_score,
+                                         seed=game_seed, seconds=round(time.time() - game_start, 1))
+
                     # Show Game Over screen if no lives remain
-                    stdscr.clear()
-                    stdscr.addstr(sh // 2 - 7, sw // 2 - 30, "     _     _ _             _                _                            ")
-                    stdscr.addstr(sh // 2 - 6, sw // 2 - 30, " ___| |__ (_) |_        __| | ___  __ _  __| |                           ")
-                    stdscr.addstr(sh // 2 - 5, sw // 2 - 30, "/ __| '_ \| | __|      / _` |/ _ \/ _` |/ _` |                           ")
-                    stdscr.addstr(sh // 2 - 4, sw // 2 - 30, "\__ \ | | | | |_ _ _  | (_| |  __/ (_| | (_| |                           ")
-                    stdscr.addstr(sh // 2 - 3, sw // 2 - 30, "|___/_| |_|_|\__(_|_)  \__,_|\___|\__,_|\__,_|                           ")
-                    stdscr.addstr(sh // 2 - 2, sw // 2 - 30, "       _                    _      ___   _      _         _              ")
-                    stdscr.addstr(sh // 2 - 1, sw // 2 - 30, "  __ _| |_ __ ___  __ _  __| |_   |__ \ | | ___| |_ ___  | |_ _ __ _   _ ")
-                    stdscr.addstr(sh // 2, sw // 2 - 30, " / _` | | '__/ _ \/ _` |/ _` | | | |/ / | |/ _ \ __/ __| | __| '__| | | |")
-                    stdscr.addstr(sh // 2 + 1, sw // 2 - 30, "| (_| | | | |  __/ (_| | (_| | |_| |_|  | |  __/ |_\__ \ | |_| |  | |_| |")
-                    stdscr.addstr(sh // 2 + 2, sw // 2 - 30, " \__,_|_|_|  \___|\__,_|\__,_|\__, (_)  |_|\___|\__|___/  \__|_|   \__, |")
-                    stdscr.addstr(sh // 2 + 3, sw // 2 - 30, "                              |___/                                |___/ ")
-                    stdscr.addstr(sh // 2 + 5, sw // 2 - 10, f"Final Score: {score}")
-                    stdscr.addstr(sh // 2 + 6, sw // 2 - 10, f"Personal High Score: {high_score}")
+                    banner = get_banner(GAME_OVER_BANNER)
+                    banner.text(5, -10, f"Final Score: {score}")
+                    banner.text(6, -10, f"Personal High Score: {high_score}")
+                    for row in (8, 9, 11):
+                        banner.text(row, -10, "")
 
                     # Check if score qualifies for top 10
-                    high_scores = load_high_scores()
-                    if len(high_scores) < 10 or score > high_scores[-1][0]:
-                        stdscr.addstr(sh // 2 + 8, sw // 2 - 10, "New High Score! Enter your name: ")
-                        stdscr.refresh()
+                    if score_store.qualifies(score):
+                        banner.text(8, -10, "New High Score! Enter your name: ")
+                        banner.show(stdscr)
 
                         curses.echo()  # Enable echoing of characters to capture name
                         # Show an underline where the user can type their name
-                        name_win = curses.newwin(1, 20, sh // 2 + 9, sw // 2 - 10)
+                        sh, sw = stdscr.getmaxyx()
+                        name_y, name_x = min(sh // 2 + 9, sh - 1), max(sw // 2 - 10, 0)
+                        name_win = curses.newwin(1, min(20, sw - name_x), name_y, name_x)
                         name_win.attron(curses.A_UNDERLINE)
                         name_win.refresh()
                         name = name_win.getstr().decode("utf-8").strip()
                         curses.noecho()  # Disable echoing again
+                        banner.text(9, -10, name)
 
                         update_high_scores(score, name, level_number)
+                    else:
+                        score_store.record_history(score, "", level_number)
 
-
-                    stdscr.addstr(sh // 2 + 11, sw // 2 - 10, "Press Enter to view High Scores")
-                    stdscr.refresh()
+                    banner.text(11, -10, "Press Enter to view High Scores")
+                    banner.show(stdscr)
 
                     # Wait for "Enter" to continue
-                    while True:
-                        key = stdscr.getch()
-                        if key == ord("\n") or key == curses.KEY_ENTER:
-                            break
+                    wait_for_enter(stdscr, banner)
 
                     # Display the high score board
                     display_high_scores(stdscr)
                     break
 
-curses.wrapper(main)
-
-
+# The autopilot for a game, switched on from the start with --autopilot
+def game_autopilot(options):
+    return Autopilot(options.autopilot, AUTOPILOT_BUDGET / options.tick_rate)
+
+# Command-line options
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ASCII side-scroller")
+    parser.add_argument("--tick-rate", type=float, default=TICK_RATE,
+                        help=f"simulation ticks per second (default: {TICK_RATE})")
+    parser.add_argument("--frame-stats", action="store_true",
+                        help="show the bytes written per frame next to a full repaint")
+    parser.add_argument("--world-thread", action="store_true",
+                        help="generate the world ahead of the screen on a background thread")
+    parser.add_argument("--sim-thread", action="store_true",
+                        help="run the simulation on its own thread and draw interpolated frames, so a slow "
+                             "terminal drops frames instead of slowing the game")
+    parser.add_argument("--fps", type=float, default=FRAME_RATE,
+                        help=f"frames drawn per second with --sim-thread (default: {FRAME_RATE})")
+    parser.add_argument("--output", choices=("curses", "ansi"), default="curses",
+                        help="draw frames through curses, or encode them as minimal ANSI escape sequences "
+                             "(better over SSH and slow links)")
+    parser.add_argument("--max-bps", type=int, metavar="BYTES",
+                        help="with --output ansi, cap output at BYTES per second by letting stars go stale")
+    parser.add_argument("--stars", type=int, default=MAX_STARS,
+                        help=f"number of background stars (default: {MAX_STARS})")
+    parser.add_argument("--seed", type=int, help="seed every game with this number instead of a random one")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record each game to FILE for replay (a new game overwrites it)")
+    parser.add_argument("--replay", metavar="FILE", help="play back a game recorded with --record")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback speed for --replay (default: 1.0)")
+    parser.add_argument("--headless", action="store_true",
+                        help="with --replay, re-run the game without drawing and check it matches")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="time each phase of every tick and frame; write a report to FILE on exit "
+                             "(CSV if FILE ends in .csv, otherwise JSON)")
+    parser.add_argument("--perf-hud", action="store_true",
+                        help="show frame time p50/p95/p99, late/dropped ticks and the quality level on row 1")
+    parser.add_argument("--telemetry", metavar="DIR",
+                        help="log level-ups, lost lives, game overs and frame times to compressed files in DIR "
+                             "(see scroller_telemetry.py)")
+    parser.add_argument("--autopilot", action="store_true",
+                        help="start with the autopilot playing (P switches it on and off during play)")
+    parser.add_argument("--quality", choices=["auto"] + [str(level) for level in range(len(QUALITY_LEVELS))],
+                        default="auto",
+                        help="visual detail: 0 is full, each level up draws less (fewer stars, then no "
+                             "mountains, no grass, every other frame); auto sheds detail when frames run "
+                             "over budget and restores it when there is headroom (default: auto)")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    options = parse_args()
+    if options.replay and options.headless:
+        sys.exit(0 if print_replay(options.replay) else 1)
+    elif options.replay:
+        curses.wrapper(replay_main, options)
+    else:
+        profiler = FrameProfiler() if options.profile or options.perf_hud else None
+        telemetry = Telemetry(options.telemetry) if options.telemetry else None
+        try:
+            curses.wrapper(main, options, profiler, telemetry)
+        finally:
+            if profiler is not None and options.profile:
+                profiler.dump(options.profile)
+            if telemetry is not None:
+                telemetry.close()
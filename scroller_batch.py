@@ -0,0 +1,207 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import ascii_scroller71 as game
+
+JUMP = (ord(" "),)
+IDLE = ()
+
+# Input policies: called once per tick with the state and the game's own
+# policy RNG, they return the keys pressed during that tick
+
+# Never touch the keyboard
+def idle_policy(state, rng):
+    return IDLE
+
+# Mash keys at random, about one press every five ticks
+def random_policy(state, rng):
+    if rng.random() < 0.2:
+        return (rng.choice((ord(" "), ord("a"), ord("d"), ord("s"))),)
+    return IDLE
+
+# Jump whenever an obstacle is about to reach the player's rows
+def jumper_policy(state, rng, lookahead=12):
+    if state.is_jumping:
+        return IDLE
+    player_x = state.player_x + state.scroll
+    top = state.player_y
+    bottom = state.player_y + state.player_height
+    for obs in state.obstacles.between(player_x, player_x + state.player_width + lookahead):
+        obs_height = game.OBSTACLE_SIZES[obs.kind][1]
+        if obs.y < bottom and obs.y + obs_height > top:
+            return JUMP
+    return IDLE
+
+# Let the game's autopilot play, searching ahead every few ticks. One
+# autopilot serves every game in a worker; it starts afresh on each new state.
+autopilot = game.Autopilot(on=True)
+
+def autopilot_policy(state, rng):
+    return game.ACTION_KEYS[autopilot.code(state, IDLE)]
+
+POLICIES = {"idle": idle_policy, "random": random_policy, "jumper": jumper_policy, "autopilot": autopilot_policy}
+
+# Play one headless game with every life seeded from `seed`. Only a small
+# tuple comes back: (seed, score, level, ticks, cause of each death).
+def play_game(seed, policy_name, difficulty_fields, sh, sw, lives, max_ticks):
+    policy = POLICIES[policy_name]
+    difficulty = game.Difficulty(**difficulty_fields)
+    rng = random.Random(seed)  # The policy's randomness, apart from the game's
+    seeds = game.life_seeds(seed)
+    score, speed_multiplier, high_score, level_number = 0, 1.0, 0, 1
+    ticks = 0
+    deaths = []
+    for lives_left in range(lives, 0, -1):
+        # Stars never affect play, so skip them
+        state = game.GameState(sh, sw, lives_left, score, speed_multiplier, high_score, level_number,
+                               max_stars=0, seed=next(seeds), difficulty=difficulty)
+        while True:
+            event = game.step(state, policy(state, rng))
+            if event == game.LIFE_LOST:
+                break
+            if ticks + state.ticks >= max_ticks:
+                state.death_cause = game.DEATH_TIMEOUT
+                break
+        ticks += state.ticks
+        deaths.append(state.death_cause)
+        _, score, speed_multiplier, high_score, level_number = state.result()
+        if state.death_cause == game.DEATH_TIMEOUT:
+            break
+    return seed, score, level_number, ticks, tuple(deaths)
+
+# Worker entry point: play a run of seeds and return their results together,
+# so each round trip to the pool carries many games
+def play_games(seeds, policy_name, difficulty_fields, sh, sw, lives, max_ticks):
+    return [play_game(seed, policy_name, difficulty_fields, sh, sw, lives, max_ticks) for seed in seeds]
+
+# Running totals for one difficulty variant
+class Summary:
+    def __init__(self):
+        self.scores = []
+        self.levels = Counter()
+        self.deaths = Counter()  # Every lost life
+        self.final_deaths = Counter()  # The life that ended the game
+        self.ticks = 0
+
+    def add(self, result):
+        _, score, level, ticks, deaths = result
+        self.scores.append(score)
+        self.levels[level] += 1
+        self.deaths.update(deaths)
+        self.final_deaths[deaths[-1]] += 1
+        self.ticks += ticks
+
+    def percentile(self, p):
+        scores = sorted(self.scores)
+        return scores[min(len(scores) - 1, int(p / 100 * len(scores)))]
+
+    def as_dict(self):
+        games = len(self.scores)
+        return {
+            "games": games,
+            "ticks": self.ticks,
+            "score_mean": round(sum(self.scores) / games, 1),
+            "score_p10": self.percentile(10),
+            "score_p50": self.percentile(50),
+            "score_p90": self.percentile(90),
+            "score_max": max(self.scores),
+            "levels": dict(sorted(self.levels.items())),
+            "deaths": dict(self.deaths.most_common()),
+            "final_deaths": dict(self.final_deaths.most_common()),
+        }
+
+# Parse "name=v1,v2,..." into a Difficulty field and its values
+def parse_setting(text):
+    name, _, values = text.partition("=")
+    if name not in game.Difficulty.FIELDS:
+        raise argparse.ArgumentTypeError(f"unknown difficulty setting {name!r}; "
+                                         f"choose from {', '.join(game.Difficulty.FIELDS)}")
+    kind = type(getattr(game.DEFAULT_DIFFICULTY, name))
+    try:
+        return name, [kind(value) for value in values.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad value in {text!r}")
+
+# Every combination of the swept settings, on top of the defaults
+def difficulty_variants(settings):
+    names = [name for name, _ in settings]
+    for values in itertools.product(*(values for _, values in settings)):
+        fields = game.DEFAULT_DIFFICULTY.as_dict()
+        fields.update(zip(names, values))
+        yield dict(zip(names, values)), fields
+
+def print_summary(label, summary):
+    stats = summary.as_dict()
+    print(f"{label}: {stats['games']} games, score mean {stats['score_mean']} "
+          f"p10/p50/p90/max {stats['score_p10']}/{stats['score_p50']}/{stats['score_p90']}/{stats['score_max']}")
+    print("  levels reached: " + " ".join(f"{level}:{count}" for level, count in stats["levels"].items()))
+    print("  deaths: " + ", ".join(f"{cause} {count}" for cause, count in stats["deaths"].items()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many seeded headless games of ascii_scroller71 in parallel")
+    parser.add_argument("--games", type=int, default=1000, help="games per difficulty variant (default: 1000)")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="jumper", help="input policy (default: jumper)")
+    parser.add_argument("--set", dest="settings", type=parse_setting, action="append", default=[],
+                        metavar="NAME=V1,V2", help="sweep a difficulty setting over these values; repeatable")
+    parser.add_argument("--size", default="80x24", help="screen size WxH (default: 80x24)")
+    parser.add_argument("--lives", type=int, default=4, help="lives per game (default: 4)")
+    parser.add_argument("--max-ticks", type=int, default=20000, help="end a game after this many ticks (default: 20000)")
+    parser.add_argument("--seed", type=int, default=0, help="first game seed (default: 0)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: one per CPU)")
+    parser.add_argument("--chunk", type=int, default=50, help="games per task sent to a worker (default: 50)")
+    parser.add_argument("--out", metavar="FILE", help="stream every game's result to FILE as JSON lines")
+    parser.add_argument("--summary", metavar="FILE", help="write the per-variant distributions to FILE as JSON")
+    args = parser.parse_args()
+
+    sw, sh = (int(value) for value in args.size.lower().split("x"))
+    seeds = range(args.seed, args.seed + args.games)
+    variants = list(difficulty_variants(args.settings))
+    summaries = [Summary() for _ in variants]
+    out = open(args.out, "w") if args.out else None
+    start = time.perf_counter()
+    done = 0
+
+    with ProcessPoolExecutor(args.workers) as pool:
+        futures = {}
+        for index, (_, fields) in enumerate(variants):
+            for first in range(0, len(seeds), args.chunk):
+                future = pool.submit(play_games, seeds[first:first + args.chunk], args.policy, fields,
+                                     sh, sw, args.lives, args.max_ticks)
+                futures[future] = index
+        total = len(variants) * len(seeds)
+        for future in as_completed(futures):
+            index = futures[future]
+            results = future.result()
+            for result in results:
+                summaries[index].add(result)
+                if out is not None:
+                    seed, score, level, ticks, deaths = result
+                    out.write(json.dumps({"variant": variants[index][0], "seed": seed, "score": score,
+                                          "level": level, "ticks": ticks, "deaths": deaths}) + "\n")
+            done += len(results)
+            print(f"\r{done}/{total} games", end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    if out is not None:
+        out.close()
+
+    elapsed = time.perf_counter() - start
+    for (changes, _), summary in zip(variants, summaries):
+        label = ", ".join(f"{name}={value}" for name, value in changes.items()) or "defaults"
+        print_summary(label, summary)
+    total_ticks = sum(summary.ticks for summary in summaries)
+    print(f"{done} games, {total_ticks} ticks in {elapsed:.1f}s ({total_ticks / elapsed:.0f} ticks/s)")
+
+    if args.summary:
+        with open(args.summary, "w") as file:
+            json.dump([dict(variant=changes, **summary.as_dict()) for (changes, _), summary in zip(variants, summaries)],
+                      file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import ascii_scroller71 as game
+
+# Build a level-1 game state whose screen is wide enough to hold `count`
+# obstacles at the minimum spawn spacing, all already on screen
+def crowded_state(count, seed=0):
+    sw = 5 * count + 80
+    state = game.GameState(24, sw, seed=seed)
+    rng = state.rng
+    for i in range(count):
+        x = 40 + 5 * i
+        kind = rng.choice((game.KIND_2X2, game.KIND_5X3, game.KIND_NEW))
+        state.obstacles.add(game.Obstacle(x, rng.randint(2, state.sh - 5), kind))
+    return state
+
+# One tick of spawning and collision the way game_loop did it before the
+# scroll lanes: every obstacle is moved, tested against the player and
+# copied into a new list, and every spawn scans the whole list
+def linear_tick(obstacles, player_x, player_y, sw):
+    new_x = sw - 1
+    if not any(abs(new_x - obs[0]) < 5 for obs in obstacles):
+        obstacles.append([new_x, random.randint(2, 19), '2x2'])
+    new_obstacles = []
+    for obs in obstacles:
+        obs[0] -= 2
+        obs_width, obs_height = (5, 3) if obs[2] == '5x3' else (2, 2)
+        if ((player_x < obs[0] + obs_width and player_x + 3 > obs[0]) and
+            (player_y < obs[1] + obs_height and player_y + 3 > obs[1])):
+            pass  # Keep going so every tick costs the same
+        if obs[0] > 0:
+            new_obstacles.append(obs)
+    return new_obstacles
+
+# Time spawning plus collision per tick as the number of live obstacles grows
+def bench_broadphase(counts, ticks):
+    print(f"{'obstacles':>10} {'indexed us/tick':>16} {'linear us/tick':>15}")
+    for count in counts:
+        state = crowded_state(count)
+        state.player_y = 0  # Keep the player clear of obstacles so no tick ends the run
+        start = time.perf_counter()
+        for _ in range(ticks):
+            game.spawn_entities(state)
+            game.move_entities(state)
+        indexed = (time.perf_counter() - start) / ticks * 1e6
+
+        state = crowded_state(count)
+        obstacles = [[obs.x, obs.y, game.OBSTACLE_KIND_NAMES[obs.kind]] for obs in state.obstacles]
+        start = time.perf_counter()
+        for _ in range(ticks):
+            obstacles = linear_tick(obstacles, state.player_x, 0, state.sw)
+        linear = (time.perf_counter() - start) / ticks * 1e6
+        print(f"{count:>10} {indexed:>16.1f} {linear:>15.1f}")
+
+ALLOC_WARMUP = 5000  # Ticks before measuring, long enough for the pools to reach their high-water mark
+ALLOC_TURNOVER = 500  # Traced ticks before the first snapshot
+ALLOC_MAX_BYTES_PER_TICK = 1.0  # Net growth allowed per tick once warmed up
+ALLOC_MAX_CREATED = 0  # Entities the pools may create after warm-up
+
+# Measure what the simulation allocates once it has warmed up: net growth
+# of traced memory, the largest transient peak inside one tick, and how many
+# entity objects the pools had to create instead of reusing. The level is
+# pinned, since each level-up packs more entities on screen and the pools
+# grow to match. Returns the failed limits, if any.
+def check_allocations(ticks, warmup=ALLOC_WARMUP, seed=0, max_bytes_per_tick=ALLOC_MAX_BYTES_PER_TICK,
+                      max_created=ALLOC_MAX_CREATED):
+    state = game.GameState(24, 80, level_number=3, seed=seed, difficulty=game.Difficulty(level_points=10 ** 9))
+    # Park the player left of the screen, where every entity has already
+    # expired, so the run never ends in a collision
+    state.player_x = -100
+    for _ in range(warmup):
+        game.step(state, (), game.TICK_INTERVAL)
+    pools = (state.obstacle_pool, state.structure_pool, state.grass_pool)
+    created = sum(pool.created for pool in pools)
+
+    # Trace a stretch of ticks before the first snapshot, long enough for
+    # everything alive in the world to have been replaced. Otherwise objects
+    # built before tracing started look like growth when they are replaced.
+    tracemalloc.start()
+    for _ in range(ALLOC_TURNOVER):
+        game.step(state, (), game.TICK_INTERVAL)
+    before = tracemalloc.take_snapshot()
+    worst_peak = 0
+    for _ in range(ticks):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        game.step(state, (), game.TICK_INTERVAL)
+        worst_peak = max(worst_peak, tracemalloc.get_traced_memory()[1] - current)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    growth = sum(stat.size_diff for stat in after.compare_to(before, "filename")
+                 if stat.traceback[0].filename == game.__file__)
+    created = sum(pool.created for pool in pools) - created
+    failures = []
+    if growth / ticks > max_bytes_per_tick:
+        failures.append(f"net growth over {max_bytes_per_tick} bytes/tick")
+    if created > max_created:
+        failures.append(f"more than {max_created} entities created after warm-up")
+    print(f"ticks: {ticks}")
+    print(f"net growth: {growth / ticks:.1f} bytes/tick")
+    print(f"largest transient peak in a tick: {worst_peak} bytes")
+    print(f"entities created after warm-up: {created}")
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    return failures
+
+# Stands in for a curses window: accepts writes and counts what they cost
+class FakeWindow:
+    def __init__(self):
+        self.writes = 0
+
+    def addstr(self, y, x, text):
+        self.writes += 1
+
+    def noutrefresh(self):
+        pass
+
+SUITE_SIZES = [(80, 24), (120, 40), (200, 60), (400, 120)]
+SUITE_LEVELS = list(range(1, 16))
+
+# A game state part way into `level`, with the speed multiplier compounded
+# the way level-ups compound it, and the screen already full
+def level_state(sw, sh, level, seed=0):
+    state = game.GameState(sh, sw, score=(level - 1) * 500, obstacle_speed_multiplier=1.2 ** (level - 1),
+                           level_number=level, seed=seed)
+    state.player_x = -100  # Off screen, so nothing can end the run
+    for _ in range(sw):
+        game.step(state, (), game.TICK_INTERVAL)
+    return state
+
+# Run `ticks` full game-loop iterations (step, render, diff against the
+# previous frame) for one screen size and level
+def bench_config(sw, sh, level, ticks, alloc_ticks):
+    state = level_state(sw, sh, level)
+    buf = game.FrameBuffer(sh, sw)
+    window = FakeWindow()
+    game.render(buf, state)
+    buf.write(window)
+    bytes_before = buf.bytes_total
+    sim = draw = 0.0
+    for _ in range(ticks):
+        start = time.perf_counter()
+        game.step(state, (), game.TICK_INTERVAL)
+        stepped = time.perf_counter()
+        game.render(buf, state)
+        buf.write(window)
+        sim += stepped - start
+        draw += time.perf_counter() - stepped
+    output = (buf.bytes_total - bytes_before) / ticks
+
+    # Allocation is traced in a separate, shorter pass since tracing is slow
+    tracemalloc.start()
+    allocated = 0
+    for _ in range(alloc_ticks):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        game.step(state, (), game.TICK_INTERVAL)
+        game.render(buf, state)
+        buf.write(window)
+        allocated += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+
+    return {
+        "size": f"{sw}x{sh}",
+        "level": level,
+        "mountains": level % 3 == 0,
+        "ticks_per_sec": round(ticks / (sim + draw), 1),
+        "sim_us": round(sim / ticks * 1e6, 1),
+        "render_us": round(draw / ticks * 1e6, 1),
+        "alloc_bytes_per_tick": round(allocated / max(alloc_ticks, 1)),
+        "output_bytes_per_tick": round(output, 1),
+    }
+
+def run_suite(sizes, levels, ticks, alloc_ticks):
+    print(f"{'size':>8} {'level':>5} {'mtn':>3} {'ticks/s':>9} {'sim us':>8} {'render us':>9} "
+          f"{'alloc B/t':>9} {'out B/t':>8}")
+    results = []
+    for sw, sh in sizes:
+        for level in levels:
+            result = bench_config(sw, sh, level, ticks, alloc_ticks)
+            results.append(result)
+            print(f"{result['size']:>8} {level:>5} {'yes' if result['mountains'] else '':>3} "
+                  f"{result['ticks_per_sec']:>9.0f} {result['sim_us']:>8.1f} {result['render_us']:>9.1f} "
+                  f"{result['alloc_bytes_per_tick']:>9} {result['output_bytes_per_tick']:>8.0f}")
+    return results
+
+# Compare ticks/sec against a saved baseline; returns the configurations
+# that got slower by more than `tolerance` (a fraction)
+def compare_baseline(results, baseline, tolerance):
+    previous = {(entry["size"], entry["level"]): entry for entry in baseline["results"]}
+    regressions = []
+    print(f"\n{'size':>8} {'level':>5} {'baseline':>9} {'now':>9} {'change':>8}")
+    for result in results:
+        old = previous.get((result["size"], result["level"]))
+        if old is None:
+            continue
+        change = result["ticks_per_sec"] / old["ticks_per_sec"] - 1
+        flag = ""
+        if change < -tolerance:
+            regressions.append(result)
+            flag = "  SLOWER"
+        print(f"{result['size']:>8} {result['level']:>5} {old['ticks_per_sec']:>9.0f} "
+              f"{result['ticks_per_sec']:>9.0f} {change:>+8.1%}{flag}")
+    return regressions
+
+def parse_size(text):
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for ascii_scroller71")
+    parser.add_argument("--ticks", type=int, default=500, help="ticks per measurement (default: 500)")
+    parser.add_argument("--alloc", action="store_true",
+                        help="check steady-state allocation with tracemalloc; exits 1 past the limits")
+    parser.add_argument("--max-bytes-per-tick", type=float, default=ALLOC_MAX_BYTES_PER_TICK,
+                        help=f"net growth --alloc allows per tick (default: {ALLOC_MAX_BYTES_PER_TICK})")
+    parser.add_argument("--max-created", type=int, default=ALLOC_MAX_CREATED,
+                        help=f"entities --alloc allows the pools to create after warm-up (default: {ALLOC_MAX_CREATED})")
+    parser.add_argument("--suite", action="store_true",
+                        help="run the game loop over a matrix of screen sizes and levels")
+    parser.add_argument("--sizes", type=parse_size, nargs="+", default=SUITE_SIZES, metavar="WxH",
+                        help="screen sizes for --suite (default: 80x24 120x40 200x60 400x120)")
+    parser.add_argument("--levels", type=int, nargs="+", default=SUITE_LEVELS,
+                        help="levels for --suite (default: 1 to 15)")
+    parser.add_argument("--alloc-ticks", type=int, default=50,
+                        help="ticks traced for allocations per --suite configuration (default: 50)")
+    parser.add_argument("--save", metavar="FILE", help="save --suite results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare --suite results against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="slowdown in ticks/sec that counts as a regression (default: 0.1)")
+    args = parser.parse_args()
+    if args.suite:
+        results = run_suite(args.sizes, args.levels, args.ticks, args.alloc_ticks)
+        if args.save:
+            with open(args.save, "w") as file:
+                json.dump({"ticks": args.ticks, "python": sys.version.split()[0], "results": results}, file, indent=2)
+        failed = False
+        if args.compare:
+            with open(args.compare) as file:
+                baseline = json.load(file)
+            failed = bool(compare_baseline(results, baseline, args.tolerance))
+        # The suite is the regression gate, so it holds the allocation limits too
+        print()
+        if check_allocations(args.ticks, max_bytes_per_tick=args.max_bytes_per_tick, max_created=args.max_created):
+            failed = True
+        if failed:
+            sys.exit(1)
+    elif args.alloc:
+        if check_allocations(args.ticks, max_bytes_per_tick=args.max_bytes_per_tick, max_created=args.max_created):
+            sys.exit(1)
+    else:
+        bench_broadphase([10, 100, 1000, 10000], args.ticks)
+
+if __name__ == "__main__":
+    main()
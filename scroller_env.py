@@ -0,0 +1,224 @@
+import argparse
+import multiprocessing
+import random
+import time
+
+import numpy as np
+
+import ascii_scroller71 as game
+
+# Actions, by index into an action array
+NOOP, JUMP, LEFT, RIGHT, HOLD = range(5)
+ACTION_NAMES = ("noop", "jump", "left", "right", "hold")
+# The replay action code for each action; NOOP presses nothing, which
+# releases the movement controls the same way an idle keyboard does
+ACTION_CODES = np.array([game.encode_inputs(keys) for keys in
+                         ((), game.JUMP_KEYS[:1], (ord("a"),), (ord("d"),), game.HOLD_KEYS[:1])], dtype=np.intp)
+
+# Occupancy grid values
+EMPTY, STRUCTURE, OBSTACLE = 0, 1, 2
+PLAYER_FEATURES = ("x", "y", "velocity", "jumping", "speed")
+
+# A batch of independent single-life games stepped in lock-step with the
+# game's own step(), so physics, spawning and collisions are exactly the
+# game's. Observations are built in arrays allocated once and refilled
+# every step, and returned as copies a caller may keep across steps:
+#   grid:   (envs, rows, cols) uint8 occupancy of the screen, `downsample`
+#           cells to a side per grid cell, marking obstacles and structures
+#   player: (envs, 5) float32 x and y as fractions of the screen, vertical
+#           velocity, whether mid-jump, and the obstacle speed
+# A game that ends is reset at once with a new seed, and the observation
+# returned for it is its new game's first, as Gym vector environments do.
+class VectorEnv:
+    def __init__(self, num_envs, sh=24, sw=80, downsample=2, max_ticks=20000, seed=None,
+                 difficulty=game.DEFAULT_DIFFICULTY):
+        self.num_envs = num_envs
+        self.sh = sh
+        self.sw = sw
+        self.downsample = downsample
+        self.max_ticks = max_ticks
+        self.difficulty = difficulty
+        self.seeds = random.Random(seed)  # Seeds every game, so a run can be repeated
+        self.states = [None] * num_envs
+        rows, cols = -(-sh // downsample), -(-sw // downsample)
+        self.grid = np.zeros((num_envs, rows, cols), dtype=np.uint8)
+        self.player = np.zeros((num_envs, len(PLAYER_FEATURES)), dtype=np.float32)
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        self.scores = np.zeros(num_envs, dtype=np.int64)  # Final score of games that just ended
+        self.levels = np.zeros(num_envs, dtype=np.int64)
+        self.ticks = np.zeros(num_envs, dtype=np.int64)
+        self.causes = [None] * num_envs
+
+    def new_state(self):
+        # Stars never affect play, so skip them
+        return game.GameState(self.sh, self.sw, max_stars=0, seed=self.seeds.getrandbits(63),
+                              difficulty=self.difficulty)
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.seeds.seed(seed)
+        for i in range(self.num_envs):
+            self.states[i] = self.new_state()
+            self.observe(i)
+        return self.observation()
+
+    # Advance every game one tick. `actions` holds one action per game.
+    # Returns (observation, rewards, dones, info); info holds arrays for
+    # the games that just ended: their score, level, tick count, whether
+    # they were cut off at max_ticks, and what killed them. Games still
+    # running have 0, False and None there.
+    def step(self, actions):
+        codes = ACTION_CODES[np.asarray(actions)]
+        action_keys = game.ACTION_KEYS
+        self.dones[:] = False
+        self.truncated[:] = False
+        self.scores[:] = 0
+        self.levels[:] = 0
+        self.ticks[:] = 0
+        self.causes = [None] * self.num_envs
+        for i, state in enumerate(self.states):
+            score = state.score
+            event = game.step(state, action_keys[codes[i]])
+            self.rewards[i] = state.score - score
+            if event == game.LIFE_LOST or state.ticks >= self.max_ticks:
+                self.dones[i] = True
+                if event != game.LIFE_LOST:
+                    self.truncated[i] = True
+                    state.death_cause = game.DEATH_TIMEOUT
+                self.scores[i], self.levels[i], self.ticks[i] = state.score, state.level_number, state.ticks
+                self.causes[i] = state.death_cause
+                state = self.states[i] = self.new_state()
+            self.observe(i)
+        info = {"score": self.scores.copy(), "level": self.levels.copy(), "ticks": self.ticks.copy(),
+                "truncated": self.truncated.copy(), "death_cause": self.causes}
+        return self.observation(), self.rewards.copy(), self.dones.copy(), info
+
+    def observation(self):
+        return {"grid": self.grid.copy(), "player": self.player.copy()}
+
+    # Refill game i's slice of the observation arrays
+    def observe(self, i):
+        state = self.states[i]
+        grid = self.grid[i]
+        grid.fill(EMPTY)
+        d = self.downsample
+        scroll, sw = state.scroll, state.sw
+        for structure in state.structures:
+            x = structure.x - scroll
+            if x < sw:
+                grid[structure.y // d:(structure.y + game.STRUCTURE_HEIGHT - 1) // d + 1,
+                     max(x, 0) // d:(x + game.STRUCTURE_WIDTH - 1) // d + 1] = STRUCTURE
+        for obs in state.obstacles:
+            x = obs.x - scroll
+            if x < sw:
+                width, height = game.OBSTACLE_SIZES[obs.kind]
+                grid[obs.y // d:(obs.y + height - 1) // d + 1, max(x, 0) // d:(x + width - 1) // d + 1] = OBSTACLE
+        player = self.player[i]
+        player[0] = state.player_x / sw
+        player[1] = state.player_y / state.sh
+        player[2] = state.velocity
+        player[3] = state.is_jumping
+        player[4] = state.obstacle_speed
+
+# Worker process for one shard of a ShardedVectorEnv
+def run_shard(conn, num_envs, kwargs):
+    env = VectorEnv(num_envs, **kwargs)
+    while True:
+        command, data = conn.recv()
+        if command == "reset":
+            conn.send(env.reset(data))
+        elif command == "step":
+            conn.send(env.step(data))
+        else:
+            conn.close()
+            return
+
+# A VectorEnv split across worker processes, with the same interface. Each
+# shard steps its share of the games while the others do theirs, and the
+# results are joined in game order.
+class ShardedVectorEnv:
+    def __init__(self, num_envs, shards, seed=None, **kwargs):
+        self.num_envs = num_envs
+        sizes = [num_envs // shards + (i < num_envs % shards) for i in range(shards)]
+        self.bounds = np.cumsum([0] + sizes)
+        seeds = random.Random(seed)
+        self.conns = []
+        self.workers = []
+        for size in sizes:
+            parent, child = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=run_shard, daemon=True,
+                                             args=(child, size, dict(kwargs, seed=seeds.getrandbits(63))))
+            worker.start()
+            child.close()
+            self.conns.append(parent)
+            self.workers.append(worker)
+
+    def reset(self, seed=None):
+        seeds = random.Random(seed) if seed is not None else None
+        for conn in self.conns:
+            conn.send(("reset", seeds and seeds.getrandbits(63)))
+        return join_observations([conn.recv() for conn in self.conns])
+
+    def step(self, actions):
+        actions = np.asarray(actions)
+        for conn, lo, hi in zip(self.conns, self.bounds, self.bounds[1:]):
+            conn.send(("step", actions[lo:hi]))
+        results = [conn.recv() for conn in self.conns]
+        info = {}
+        for key in results[0][3]:
+            parts = [result[3][key] for result in results]
+            info[key] = sum(parts, []) if isinstance(parts[0], list) else np.concatenate(parts)
+        return (join_observations([result[0] for result in results]),
+                np.concatenate([result[1] for result in results]),
+                np.concatenate([result[2] for result in results]), info)
+
+    def close(self):
+        for conn in self.conns:
+            conn.send(("close", None))
+        for worker in self.workers:
+            worker.join()
+
+def join_observations(observations):
+    return {key: np.concatenate([observation[key] for observation in observations]) for key in observations[0]}
+
+def main():
+    parser = argparse.ArgumentParser(description="Step many headless games of ascii_scroller71 as a vector environment")
+    parser.add_argument("--envs", type=int, default=64, help="games stepped together (default: 64)")
+    parser.add_argument("--shards", type=int, default=1, help="worker processes to split the games across (default: 1)")
+    parser.add_argument("--steps", type=int, default=1000, help="vector steps to run (default: 1000)")
+    parser.add_argument("--size", default="80x24", help="screen size WxH (default: 80x24)")
+    parser.add_argument("--downsample", type=int, default=2, help="screen cells per grid cell side (default: 2)")
+    parser.add_argument("--policy", choices=("random", "noop"), default="random", help="actions to take (default: random)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the games and the policy (default: 0)")
+    args = parser.parse_args()
+
+    sw, sh = (int(value) for value in args.size.lower().split("x"))
+    kwargs = {"sh": sh, "sw": sw, "downsample": args.downsample}
+    if args.shards > 1:
+        env = ShardedVectorEnv(args.envs, args.shards, seed=args.seed, **kwargs)
+    else:
+        env = VectorEnv(args.envs, seed=args.seed, **kwargs)
+    rng = np.random.default_rng(args.seed)
+    observation = env.reset()
+    print(f"grid {observation['grid'].shape}, player {observation['player'].shape}")
+    episodes = 0
+    total_score = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        if args.policy == "random":
+            actions = rng.integers(0, len(ACTION_NAMES), args.envs)
+        else:
+            actions = np.full(args.envs, NOOP)
+        observation, rewards, dones, info = env.step(actions)
+        episodes += int(dones.sum())
+        total_score += int(info["score"][dones].sum())
+    elapsed = time.perf_counter() - start
+    if args.shards > 1:
+        env.close()
+    print(f"{args.envs * args.steps} env-steps in {elapsed:.1f}s ({args.envs * args.steps / elapsed:.0f}/s), "
+          f"{episodes} games ended, mean score {total_score / max(episodes, 1):.0f}")
+
+if __name__ == "__main__":
+    main()
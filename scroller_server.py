@@ -0,0 +1,357 @@
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import traceback
+
+import ascii_scroller71 as game
+
+# Telnet protocol bytes (RFC 854, 857, 858, 1073)
+IAC, DONT, DO, WONT, WILL, SB, SE = 255, 254, 253, 252, 251, 250, 240
+OPT_ECHO, OPT_SGA, OPT_NAWS = 1, 3, 31
+# Ask the client for character-at-a-time input with no local echo, and for its window size
+TELNET_SETUP = bytes([IAC, WILL, OPT_ECHO, IAC, WILL, OPT_SGA, IAC, DO, OPT_NAWS])
+
+CLEAR_SCREEN = "\x1b[?25l\x1b[2J"  # Hide the cursor and clear
+RESTORE_SCREEN = "\x1b[0m\x1b[2J\x1b[H\x1b[?25h"
+MIN_SIZE = (12, 40)  # Smallest (height, width) a session will play at
+MAX_SIZE = (200, 400)
+DEFAULT_SIZE = (24, 80)
+SEND_BUFFER_LIMIT = 64 * 1024  # Hold frames back from clients with this much output still queued
+LIFE_LOST_PAUSE = 2.0  # Seconds between losing a life and the next one starting
+
+# Pulls keys and window-size reports out of a telnet byte stream, which may
+# split a command across reads
+class TelnetParser:
+    def __init__(self):
+        self.pending = b""
+
+    # Returns (keys, size) where size is the latest (height, width) report or None
+    def feed(self, data):
+        data = self.pending + data
+        self.pending = b""
+        keys = []
+        size = None
+        i = 0
+        while i < len(data):
+            byte = data[i]
+            if byte != IAC:
+                keys.append(byte)
+                i += 1
+                continue
+            if i + 1 >= len(data):
+                break
+            command = data[i + 1]
+            if command == IAC:  # Escaped 255
+                keys.append(IAC)
+                i += 2
+            elif command in (DO, DONT, WILL, WONT):
+                if i + 2 >= len(data):
+                    break
+                i += 3
+            elif command == SB:
+                end = data.find(bytes([IAC, SE]), i + 2)
+                if end < 0:
+                    break
+                option = data[i + 2:end]
+                if len(option) == 5 and option[0] == OPT_NAWS:
+                    size = (option[3] << 8 | option[4], option[1] << 8 | option[2])
+                i = end + 2
+            else:
+                i += 2
+        self.pending = data[i:]
+        return keys, size
+
+# One connected player: a game, its screen buffer and the socket it draws to
+class Session:
+    def __init__(self, server, reader, writer):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.parser = TelnetParser()
+        self.size = DEFAULT_SIZE
+        self.state = None  # GameState while a life is being played
+        self.buf = None
+        self.output = game.AnsiOutput(max_bytes_per_sec=server.max_bps, shift_max=server.shift_max)
+        self.keys = game.KeyInput()
+        self.message = None  # Lines shown instead of the game between lives
+        self.resume_at = 0.0  # When a paused session starts its next life
+        self.lives = 0
+        self.carry = None  # Score and multipliers carried into the next life
+        self.high_score = 0
+        self.seeds = None
+        self.bytes_sent = 0
+        self.frames_skipped = 0
+        self.closed = False
+
+    def show_message(self, *lines):
+        self.state = None
+        self.message = lines
+        self.draw_message()
+
+    def draw_message(self):
+        sh, sw = self.size
+        if self.buf is None or (self.buf.sh, self.buf.sw) != (sh, sw):
+            self.buf = game.FrameBuffer(sh, sw)
+        self.buf.begin()
+        for i, line in enumerate(self.message):
+            self.buf.addstr(sh // 2 - len(self.message) // 2 + i, max(1, (sw - len(line)) // 2), line)
+        self.send_frame()
+
+    def new_game(self):
+        self.lives = 4
+        self.carry = (0, 1.0, 1)
+        self.seeds = game.life_seeds(random.getrandbits(63))
+        self.start_life()
+
+    def start_life(self):
+        sh, sw = self.size
+        score, speed_multiplier, level_number = self.carry
+        self.state = game.GameState(sh, sw, self.lives, score, speed_multiplier, self.high_score, level_number,
+                                    self.server.stars, next(self.seeds))
+        self.message = None
+        self.keys = game.KeyInput()
+        if self.buf is None or (self.buf.sh, self.buf.sw) != (sh, sw):
+            self.buf = game.FrameBuffer(sh, sw)
+
+    def on_input(self, data):
+        keys, size = self.parser.feed(data)
+        if size is not None:
+            self.size = (min(max(size[0], MIN_SIZE[0]), MAX_SIZE[0]), min(max(size[1], MIN_SIZE[1]), MAX_SIZE[1]))
+            if self.state is None and self.message is not None:
+                self.draw_message()  # Re-centre the message; a running life keeps its size
+        for key in keys:
+            if key == 3 or key == 4:  # Ctrl-C or Ctrl-D
+                self.close()
+                return
+            if self.state is not None:
+                self.keys.press(key)
+            elif key in (ord("\r"), ord("\n")) and self.lives == 0:
+                self.new_game()
+            elif key in (ord("q"), ord("Q")) and self.lives == 0:
+                self.close()
+                return
+
+    # Run this tick's simulation and draw the result
+    def tick(self, ticks, interval, now):
+        if self.state is None:
+            if self.lives and now >= self.resume_at:
+                self.start_life()
+            return
+        state = self.state
+        event = None
+        for _ in range(ticks):
+            code = game.encode_inputs(self.keys.snapshot())
+            event = game.step(state, game.ACTION_KEYS[code], interval)
+            if event is not None:
+                break
+        if event == game.LIFE_LOST:
+            self.life_lost(now)
+        else:
+            game.render(self.buf, state)
+            self.send_frame()
+
+    def life_lost(self, now):
+        state = self.state
+        self.lives -= 1
+        _, score, speed_multiplier, self.high_score, level_number = state.result()
+        self.carry = (score, speed_multiplier, level_number)
+        if self.lives:
+            self.resume_at = now + LIFE_LOST_PAUSE
+            self.show_message(f"Hit by: {state.death_cause}", f"Lives remaining: {self.lives}")
+        else:
+            self.show_message("Game over", f"Final score: {score}", f"High score: {self.high_score}", "",
+                              "Enter to play again, Q to quit")
+
+    def send_frame(self):
+        if self.closed:
+            return
+        transport = self.writer.transport
+        if transport.get_write_buffer_size() > SEND_BUFFER_LIMIT:
+            # The client is behind; leave the changes in the buffer and send
+            # them merged into a later frame
+            self.frames_skipped += 1
+            return
+        data = self.output.encode(self.buf)
+        if data:
+            self.writer.write(data)
+            self.bytes_sent += len(data)
+            self.server.bytes_sent += len(data)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.writer.write(RESTORE_SCREEN.encode())
+        except (ConnectionError, RuntimeError):
+            pass
+        self.writer.close()
+
+# Memory held by this process in bytes: resident set size where /proc has
+# it, peak RSS elsewhere
+def resident_bytes():
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+# All sessions share one event loop and one tick schedule
+class GameServer:
+    def __init__(self, tick_rate=game.TICK_RATE, stars=game.MAX_STARS, max_sessions=1000, max_bps=None,
+                 shift_max=game.ANSI_SHIFT_MAX):
+        self.tick_rate = tick_rate
+        self.max_bps = max_bps  # Output cap per session, in bytes per second
+        self.shift_max = shift_max  # Widest row shift sessions try; 0 trades bandwidth for CPU
+        self.stars = stars
+        self.max_sessions = max_sessions
+        self.sessions = set()
+        self.scheduler = game.FrameScheduler(tick_rate)
+        self.tick_ns = 0  # Time spent in the shared tick since the last stats report
+        self.ticks = 0
+        self.bytes_sent = 0  # Output to all clients, including ones that have left
+        self.baseline_memory = resident_bytes()
+
+    async def handle_client(self, reader, writer):
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(b"Server full, try again later\r\n")
+            writer.close()
+            return
+        session = Session(self, reader, writer)
+        self.sessions.add(session)
+        writer.write(TELNET_SETUP + CLEAR_SCREEN.encode())
+        session.show_message("ASCII scroller", "", "SPACE/W jump, A/D move, S hold", "", "Press Enter to start")
+        try:
+            while not session.closed:
+                data = await reader.read(1024)
+                if not data:
+                    break
+                session.on_input(data)
+        except ConnectionError:
+            pass
+        finally:
+            session.close()
+            self.sessions.discard(session)
+
+    async def run_ticks(self):
+        scheduler = self.scheduler
+        while True:
+            await asyncio.sleep(scheduler.time_until_next())
+            ticks = scheduler.due_ticks()
+            if not ticks:
+                continue
+            start = time.perf_counter_ns()
+            now = time.monotonic()
+            for session in list(self.sessions):
+                if session.closed:
+                    continue
+                try:
+                    session.tick(ticks, scheduler.interval, now)
+                except Exception:
+                    # One broken game must not stop everyone else's
+                    print(f"closing session {session.writer.get_extra_info('peername')} after an error:",
+                          file=sys.stderr)
+                    traceback.print_exc()
+                    session.close()
+                    self.sessions.discard(session)
+            self.tick_ns += time.perf_counter_ns() - start
+            self.ticks += 1
+
+    async def report_stats(self, interval):
+        last_bytes = 0
+        while True:
+            await asyncio.sleep(interval)
+            sessions = list(self.sessions)
+            count = len(sessions)
+            sent = self.bytes_sent
+            memory = resident_bytes()
+            per_session_memory = (memory - self.baseline_memory) / count if count else 0
+            tick_ms = self.tick_ns / self.ticks / 1e6 if self.ticks else 0
+            per_session_us = self.tick_ns / self.ticks / count / 1e3 if self.ticks and count else 0
+            print(f"sessions {count}  tick {tick_ms:.2f} ms ({per_session_us:.0f} us/session)  "
+                  f"late {self.scheduler.late_ticks} dropped {self.scheduler.dropped_ticks}  "
+                  f"rss {memory / 2**20:.1f} MiB ({per_session_memory / 1024:.0f} KiB/session)  "
+                  f"out {(sent - last_bytes) / interval / 1024:.0f} KiB/s  "
+                  f"skipped frames {sum(session.frames_skipped for session in sessions)}", flush=True)
+            last_bytes = sent
+            self.tick_ns = self.ticks = 0
+
+async def serve(args):
+    server = GameServer(args.tick_rate, args.stars, args.max_sessions, args.max_bps,
+                        0 if args.no_shift else game.ANSI_SHIFT_MAX)
+    listener = await asyncio.start_server(server.handle_client, args.host, args.port)
+    print(f"serving on {', '.join(str(sock.getsockname()) for sock in listener.sockets)}", flush=True)
+    tasks = [asyncio.create_task(server.run_ticks())]
+    if args.stats:
+        tasks.append(asyncio.create_task(server.report_stats(args.stats)))
+    async with listener:
+        # Wait on the server's own tasks too, so if one fails the server
+        # stops with its traceback instead of carrying on without it
+        await asyncio.gather(listener.serve_forever(), *tasks)
+
+# Load generator: many scripted clients that press random keys and start a
+# new game whenever one ends
+async def load_client(host, port, duration, totals):
+    reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random()
+    deadline = time.monotonic() + duration
+
+    async def drain():
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return
+            totals["bytes"] += len(data)
+
+    receiver = asyncio.create_task(drain())
+    try:
+        while time.monotonic() < deadline and not receiver.done():
+            key = rng.choice(b"\r  wads")
+            writer.write(bytes([key]))
+            await asyncio.sleep(rng.uniform(0.05, 0.5))
+    finally:
+        receiver.cancel()
+        writer.close()
+    totals["clients"] += 1
+
+async def load_test(args):
+    host, _, port = args.load_test.rpartition(":")
+    totals = {"bytes": 0, "clients": 0}
+    start = time.monotonic()
+    await asyncio.gather(*(load_client(host or "127.0.0.1", int(port), args.duration, totals)
+                           for _ in range(args.clients)))
+    elapsed = time.monotonic() - start
+    print(f"{totals['clients']} clients for {elapsed:.1f}s received {totals['bytes'] / 2**20:.1f} MiB "
+          f"({totals['bytes'] / elapsed / 1024 / max(totals['clients'], 1):.1f} KiB/s per client)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve ascii_scroller71 to many telnet clients from one process")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=2323, help="port to listen on (default: 2323)")
+    parser.add_argument("--tick-rate", type=float, default=game.TICK_RATE,
+                        help=f"simulation ticks per second (default: {game.TICK_RATE})")
+    parser.add_argument("--stars", type=int, default=game.MAX_STARS,
+                        help=f"background stars per session (default: {game.MAX_STARS})")
+    parser.add_argument("--max-sessions", type=int, default=1000, help="refuse clients beyond this (default: 1000)")
+    parser.add_argument("--max-bps", type=int, metavar="BYTES",
+                        help="cap each session's output at BYTES per second by letting stars go stale")
+    parser.add_argument("--no-shift", action="store_true",
+                        help="never scroll rows with delete-character: less CPU per session, more bytes")
+    parser.add_argument("--stats", type=float, default=0, metavar="SECS",
+                        help="print session, CPU, memory and bandwidth figures every SECS seconds")
+    parser.add_argument("--load-test", metavar="HOST:PORT", help="instead of serving, connect --clients bots to a server")
+    parser.add_argument("--clients", type=int, default=100, help="bots for --load-test (default: 100)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds for --load-test (default: 30)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(load_test(args) if args.load_test else serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import gzip
+import json
+import os
+import sys
+import zlib
+from collections import Counter, defaultdict
+
+import ascii_scroller71 as game
+
+# Every event in the logs under `paths` (directories or log files), oldest
+# file first. Returns the events and the names of files that ended early,
+# as a log being written or cut off by a crash does.
+def read_events(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += [os.path.join(path, name) for name in os.listdir(path)
+                      if name.startswith(game.TELEMETRY_FILE_PREFIX) and name.endswith(game.TELEMETRY_FILE_SUFFIX)]
+        else:
+            files.append(path)
+    events = []
+    truncated = []
+    for path in sorted(files, key=os.path.basename):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                for line in file:
+                    events.append(json.loads(line))
+        except (EOFError, gzip.BadGzipFile, zlib.error, json.JSONDecodeError):
+            truncated.append(path)
+    return events, truncated
+
+# Upper edge of the histogram bucket holding percentile p, in milliseconds;
+# None for the open-ended last bucket
+def histogram_percentile(histogram, p):
+    total = sum(histogram)
+    rank = p / 100 * total
+    seen = 0
+    for edge, count in zip(game.TELEMETRY_FRAME_BUCKETS_MS + (None,), histogram):
+        seen += count
+        if seen > rank:
+            return edge
+    return None
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))] if values else None
+
+def summarize(events):
+    sessions = defaultdict(lambda: {"start": None, "last": None, "seconds": None})
+    deaths = defaultdict(Counter)  # Level -> cause -> lives lost there
+    level_ups = Counter()  # Level reached -> times
+    scores = []
+    game_seconds = []
+    autopilot_deaths = 0
+    dropped = 0
+    histogram = [0] * (len(game.TELEMETRY_FRAME_BUCKETS_MS) + 1)
+    frames = 0
+    frame_max = 0.0
+    for event in events:
+        session = sessions[event["session"]]
+        if session["start"] is None:
+            session["start"] = event["time"]
+        session["last"] = event["time"]
+        kind = event["event"]
+        if kind == "life_lost":
+            deaths[event["level"]][event["cause"]] += 1
+            autopilot_deaths += bool(event.get("autopilot"))
+        elif kind == "level_up":
+            level_ups[event["level"]] += 1
+        elif kind == "game_over":
+            scores.append(event["score"])
+            game_seconds.append(event["seconds"])
+        elif kind == "frames":
+            histogram = [total + count for total, count in zip(histogram, event["histogram"])]
+            frames += event["count"]
+            frame_max = max(frame_max, event["max_ms"])
+        elif kind == "session_end":
+            session["seconds"] = event["seconds"]
+            dropped += event["dropped"]
+
+    # A session that never logged its end ran at least until its last event
+    session_seconds = [session["seconds"] if session["seconds"] is not None
+                       else round(session["last"] - session["start"], 1) for session in sessions.values()]
+    return {
+        "sessions": len(sessions),
+        "unfinished_sessions": sum(session["seconds"] is None for session in sessions.values()),
+        "session_seconds_p50": percentile(session_seconds, 50),
+        "session_seconds_p90": percentile(session_seconds, 90),
+        "games": len(scores),
+        "game_seconds_p50": percentile(game_seconds, 50),
+        "score_mean": round(sum(scores) / len(scores), 1) if scores else None,
+        "score_p50": percentile(scores, 50),
+        "score_max": max(scores, default=None),
+        "lives_lost": sum(sum(causes.values()) for causes in deaths.values()),
+        "lives_lost_on_autopilot": autopilot_deaths,
+        "deaths_by_level": {level: dict(causes.most_common()) for level, causes in sorted(deaths.items())},
+        "level_ups": dict(sorted(level_ups.items())),
+        "frames": frames,
+        "frame_ms_p50": histogram_percentile(histogram, 50) if frames else None,
+        "frame_ms_p95": histogram_percentile(histogram, 95) if frames else None,
+        "frame_ms_p99": histogram_percentile(histogram, 99) if frames else None,
+        "frame_ms_max": frame_max if frames else None,
+        "frame_histogram": dict(zip([f"<={edge}ms" for edge in game.TELEMETRY_FRAME_BUCKETS_MS] +
+                                    [f">{game.TELEMETRY_FRAME_BUCKETS_MS[-1]}ms"], histogram)),
+        "dropped_events": dropped,
+    }
+
+# "-" for a figure with nothing to go on, such as scores before any game ends
+def format_value(value, unit=""):
+    return "-" if value is None else f"{value}{unit}"
+
+# Percentiles from the histogram are bucket edges: "<=" the value shown
+def format_ms(value):
+    return "-" if value is None else f"<={value}"
+
+def print_summary(summary):
+    print(f"sessions: {summary['sessions']} ({summary['unfinished_sessions']} unfinished), "
+          f"length p50/p90 {format_value(summary['session_seconds_p50'])}/"
+          f"{format_value(summary['session_seconds_p90'], 's')}")
+    print(f"games: {summary['games']}, score mean {format_value(summary['score_mean'])} "
+          f"p50 {format_value(summary['score_p50'])} max {format_value(summary['score_max'])}, "
+          f"length p50 {format_value(summary['game_seconds_p50'], 's')}")
+    print(f"lives lost: {summary['lives_lost']} ({summary['lives_lost_on_autopilot']} on autopilot)")
+    # Lives lost at each level against the players who got there
+    reached = Counter(summary["level_ups"])
+    print(f"{'level':>5} {'reached':>8} {'deaths':>7}  causes")
+    for level in sorted(set(summary["deaths_by_level"]) | set(reached)):
+        causes = summary["deaths_by_level"].get(level, {})
+        print(f"{level:>5} {reached[level] if level > 1 else '-':>8} {sum(causes.values()):>7}  "
+              + ", ".join(f"{cause} {count}" for cause, count in causes.items()))
+    print(f"frames: {summary['frames']}, p50/p95/p99 {format_ms(summary['frame_ms_p50'])}/"
+          f"{format_ms(summary['frame_ms_p95'])}/{format_ms(summary['frame_ms_p99'])}ms, "
+          f"max {format_value(summary['frame_ms_max'], 'ms')}")
+    print("  " + " ".join(f"{bucket}:{count}" for bucket, count in summary["frame_histogram"].items()))
+    if summary["dropped_events"]:
+        print(f"events dropped by full queues: {summary['dropped_events']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize ascii_scroller71 telemetry logs")
+    parser.add_argument("paths", nargs="+", metavar="PATH", help="telemetry directories or log files")
+    parser.add_argument("--json", metavar="FILE", help="also write the summary to FILE as JSON")
+    args = parser.parse_args()
+
+    events, truncated = read_events(args.paths)
+    for path in truncated:
+        print(f"{path}: ends early, read up to the last complete batch", file=sys.stderr)
+    if not events:
+        print("no telemetry events found", file=sys.stderr)
+        sys.exit(1)
+    summary = summarize(events)
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(summary, file, indent=2)
+
+if __name__ == "__main__":
+    main()